@@ -0,0 +1,223 @@
+""" Micro-benchmarks for the vision, mapping, audio-mapping and database hot paths, with a committed baseline to compare against. """
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+
+import numpy as np
+import cv2
+
+# Add the parent directory to Python system's path so we can import 'src'.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.piano_logic import PianoMapper, IDENTITY_CONFIG, KEY_NAMES
+from src.finger_tracker import FingerTracker
+from src.audio_engine import AudioEngine
+from src.db_manager import MusicDB
+from src.generator import page_layout, render_png
+from src.frame_buffers import encode_jpeg_base64
+from src.markers import make_marker_detector
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Where the two markers sit on the 854x480 preview (the same spot for every benchmark).
+P_LEFT, P_RIGHT = (120.0, 260.0), (734.0, 250.0)
+
+# Projects every key of every page onto the screen (what the CV loop does each frame).
+def setup_key_targets():
+    mapper = PianoMapper()
+
+    def run():
+        for sheet_id in range(0, 12, 2):
+            mapper.set_sheet_by_id(sheet_id)
+            mapper.key_targets(P_LEFT, P_RIGHT, IDENTITY_CONFIG, 130, 90)
+
+    return run
+
+# Hit-tests 40 fingertips (10 hands x 4 tips) against one page of keys, moving them a little every frame.
+def setup_hit_testing():
+    mapper = PianoMapper()
+    targets = mapper.key_targets(P_LEFT, P_RIGHT, IDENTITY_CONFIG, 130, 90)
+    names = list(mapper.active_keys)
+    tracker = FingerTracker()
+    rng = np.random.default_rng(0)
+    base = targets[rng.integers(0, len(targets), 40)] + rng.normal(0, 10, (40, 2))
+    jitter = rng.normal(0, 8, (64, 40, 2))
+    state = {"frame": 0}
+
+    def run():
+        i = state["frame"]
+        points = base + jitter[i % len(jitter)]
+        fingers = {(h, tip): (points[4 * h + k, 0], points[4 * h + k, 1], 0.0) for h in range(10) for k, tip in enumerate((8, 12, 16, 20))}
+        tracker.update(fingers, targets, names, i / 30)
+        state["frame"] = i + 1
+
+    return run
+
+# Converts all 88 note names to MIDI numbers (an engine without a synth: only the conversion is timed).
+def setup_note_to_midi():
+    engine = AudioEngine.__new__(AudioEngine)
+    names = list(KEY_NAMES)
+
+    def run():
+        for name in names:
+            engine._note_to_midi(name)
+
+    return run
+
+# Logs one note into an on-disk database (one commit per note, like the live app).
+def setup_log_note():
+    tmp_dir = tempfile.mkdtemp(prefix="piano_bench_")
+    db = MusicDB(os.path.join(tmp_dir, "bench.db"))
+    session_id = db.start_session()
+
+    def run():
+        db.log_note(session_id, "C4")
+
+    return run
+
+# Runs ArUco detection on a printed page as the camera would see it (1280x720).
+def setup_aruco_detection():
+    aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+    page = render_png(page_layout(2), aruco_dict)
+    frame = cv2.resize(page, (1280, 905), interpolation=cv2.INTER_AREA)[:720]
+    # The same detector main.py uses.
+    detect_markers = make_marker_detector(aruco_dict)
+
+    def detect():
+        return detect_markers(frame)
+
+    _, ids, _ = detect()
+    if ids is None or sorted(ids.ravel().tolist()) != [4, 5]:
+        raise RuntimeError("ArUco benchmark page was not detected")
+    return detect
+
+# Encodes the 854x480 preview as JPEG + Base64 (what is sent to the UI).
+def setup_jpeg_base64():
+    aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+    page = cv2.resize(render_png(page_layout(2), aruco_dict), (854, 480), interpolation=cv2.INTER_AREA)
+    # Adds camera-like noise so the JPEG is not unrealistically easy to compress.
+    noise = np.random.default_rng(0).normal(0, 6, page.shape)
+    frame = np.clip(page + noise, 0, 255).astype(np.uint8)
+    return lambda: encode_jpeg_base64(frame)
+
+BENCHMARKS = {
+    "key_targets_all_pages": setup_key_targets,
+    "hit_testing_40_fingertips": setup_hit_testing,
+    "note_to_midi_88_keys": setup_note_to_midi,
+    "db_log_note": setup_log_note,
+    "aruco_detect_page": setup_aruco_detection,
+    "jpeg_base64_preview": setup_jpeg_base64,
+}
+
+# Picks how many calls make one timed round: enough to take at least min_time seconds.
+def calibrate(run, min_time):
+    run()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        if time.perf_counter() - start >= min_time:
+            return number
+        number *= 2
+
+# Times several benchmarks ({name: function}) and returns {name: best seconds per call over `repeat` rounds}.
+# The rounds are short and interleaved (one round of each benchmark, then the next round of each), so a slow
+# spell of the machine, which can last seconds on shared hardware, costs every benchmark a few rounds instead of
+# all the rounds of one benchmark.
+def measure(runs, repeat=40, min_time=0.01):
+    numbers = {name: calibrate(run, min_time) for name, run in runs.items()}
+    best = {name: float("inf") for name in runs}
+    for _ in range(repeat):
+        for name, run in runs.items():
+            number = numbers[name]
+            start = time.perf_counter()
+            for _ in range(number):
+                run()
+            best[name] = min(best[name], (time.perf_counter() - start) / number)
+    return best
+
+# Runs the selected benchmarks. Returns {name: microseconds per call}.
+def run_benchmarks(names=None, repeat=40, min_time=0.01):
+    runs = {name: setup() for name, setup in BENCHMARKS.items() if not names or name in names}
+    results = {name: seconds * 1e6 for name, seconds in measure(runs, repeat, min_time).items()}
+    for name, value in results.items():
+        print(f"{name:<28} {value:12.2f} us")
+    return results
+
+# Names of the benchmarks slower than the baseline by more than threshold percent.
+def find_regressions(results, baseline, threshold):
+    return [name for name, now in results.items() if name in baseline and now > baseline[name] * (1 + threshold / 100)]
+
+# Compares results with a baseline and prints the table. Benchmarks that look slower are re-run together
+# (`retries` times, keeping the best result), so only a regression that shows up in every run is reported.
+# Returns the names still slower than the baseline by more than threshold percent.
+def compare(results, baseline, threshold, repeat=40, retries=2):
+    for _ in range(retries):
+        suspects = find_regressions(results, baseline, threshold)
+        if not suspects:
+            break
+        print(f"Re-running {', '.join(suspects)}...")
+        again = measure({name: BENCHMARKS[name]() for name in suspects}, repeat)
+        for name in suspects:
+            results[name] = min(results[name], again[name] * 1e6)
+
+    regressions = find_regressions(results, baseline, threshold)
+    print(f"\n{'benchmark':<28} {'baseline':>12} {'now':>12} {'change':>9}")
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<28} {'-':>12} {now:12.2f} {'new':>9}")
+            continue
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<28} {before:12.2f} {now:12.2f} {(now - before) / before * 100:+8.1f}%{flag}")
+    return regressions
+
+# Ensures the function only runs if the file is executed directly.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the CV Paper Piano hot paths")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, metavar="FILE", help="compare with a baseline (default: benchmarks/baseline.json)")
+    parser.add_argument("--threshold", type=float, default=25.0, help="percent slower that counts as a regression (default: %(default)s)")
+    parser.add_argument("--save", nargs="?", const=BASELINE_PATH, metavar="FILE", help="save the results as the new baseline")
+    parser.add_argument("--repeat", type=int, default=40, help="timed rounds per benchmark (default: %(default)s)")
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))} (choose from {', '.join(BENCHMARKS)})")
+
+    results = run_benchmarks(args.names, args.repeat)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "machine": f"{platform.system()} {platform.machine()}, {platform.processor() or 'unknown CPU'}",
+                    "python": platform.python_version(),
+                    "opencv": cv2.__version__,
+                    "numpy": np.__version__,
+                    "unit": "microseconds per call (best of the rounds)",
+                    "results": {name: round(value, 3) for name, value in results.items()},
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+        print(f"\nSaved baseline to {args.save}")
+
+    # Exits non-zero on a regression (so CI marks the job as failed).
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Baseline: {baseline.get('machine')}, Python {baseline.get('python')}, OpenCV {baseline.get('opencv')}")
+        regressions = compare(results, baseline["results"], args.threshold, args.repeat)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) more than {args.threshold:.0f}% slower than the baseline: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0f}%.")
@@ -0,0 +1,325 @@
+""" This is a soak test: it drives the CV loop for a long time (hours if needed) on synthetic or recorded frames, with the audio and pywebview stubbed, and fails if memory or latency drifts. """
+
+import os
+import sys
+import json
+import time
+import types
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+import cv2
+
+# Add the parent directory to Python system's path so we can import 'src' and 'main'.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# pywebview needs a display. The harness never opens a window, so an empty module is enough for 'import webview'.
+sys.modules.setdefault("webview", types.ModuleType("webview"))
+
+import main
+from src import audio_engine
+from src.db_manager import MusicDB
+from src.piano_logic import PianoMapper, IDENTITY_CONFIG
+from src.recorder import Recording, RecordingCapture
+
+# Camera and preview sizes used by the CV loop.
+FRAME_W, FRAME_H = 1280, 720
+DISPLAY_W, DISPLAY_H = 854, 480
+
+# Where the synthetic markers (IDs 0 and 1, i.e. page 1) are drawn in the camera frame: centers and size.
+MARKER_CENTERS = ((980, 400), (300, 400))
+MARKER_SIZE = 120
+
+# Replaces FluidSynth: accepts every call and renders silence.
+class NullSynth:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+    def get_samples(self, num_frames):
+        return np.zeros(num_frames * 2, dtype=np.int16)
+
+# Replaces the pywebview window: counts the JavaScript calls instead of running them.
+class StubWindow:
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+
+    def evaluate_js(self, code):
+        self.calls += 1
+        self.bytes += len(code)
+
+    def destroy(self):
+        pass
+
+# A camera that always sees page 1 (markers 0 and 1) on a white background.
+class SyntheticCapture:
+    def __init__(self):
+        self.frame = np.full((FRAME_H, FRAME_W, 3), 255, dtype=np.uint8)
+        aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+        for marker_id, (cx, cy) in enumerate(MARKER_CENTERS):
+            marker = cv2.aruco.generateImageMarker(aruco_dict, marker_id, MARKER_SIZE)
+            x, y = cx - MARKER_SIZE // 2, cy - MARKER_SIZE // 2
+            self.frame[y : y + MARKER_SIZE, x : x + MARKER_SIZE] = marker[:, :, None]
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return False
+
+    # Returns a new array every time, like a real camera.
+    def read(self):
+        return True, self.frame.copy()
+
+    def release(self):
+        pass
+
+# Replays a recording over and over.
+class LoopingCapture:
+    def __init__(self, path):
+        self.recording = Recording(path)
+        self.cap = RecordingCapture(self.recording)
+        self.timestamp = None
+        self._offset = 0.0
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return False
+
+    # Keeps the timestamps increasing across loops, so dwell times still make sense.
+    def read(self):
+        if self.cap.finished:
+            ts = self.recording.timestamps
+            self._offset += float(ts[-1] - ts[0]) + 1 / 30
+            self.cap = RecordingCapture(self.recording)
+        ret, frame = self.cap.read()
+        self.timestamp = self.cap.timestamp + self._offset if ret else None
+        return ret, frame
+
+    def release(self):
+        pass
+
+# Stands in for MediaPipe Hands: one hand whose index fingertip sweeps back and forth along the white-key zones.
+class SyntheticHands:
+    def __init__(self, period_frames=90):
+        self.period = period_frames
+        self.t = 0
+
+        # Works out where the white-key targets land on the preview, exactly as the CV loop does.
+        sx, sy = DISPLAY_W / FRAME_W, DISPLAY_H / FRAME_H
+        centers = sorted((DISPLAY_W - cx * sx, cy * sy) for cx, cy in MARKER_CENTERS)
+        logic = PianoMapper()
+        logic.set_sheet_by_id(0)
+        targets = logic.key_targets(centers[0], centers[-1], IDENTITY_CONFIG, 130, 90)
+        white = targets[~logic.active_is_black]
+        self.x_min, self.x_max = white[:, 0].min(), white[:, 0].max()
+        self.y = white[0, 1]
+
+    def process(self, rgb):
+        self.t += 1
+        phase = 0.5 - 0.5 * np.cos(2 * np.pi * self.t / self.period)
+        x = (self.x_min + phase * (self.x_max - self.x_min)) / DISPLAY_W
+        y = self.y / DISPLAY_H
+
+        # The whole hand hangs just below the index fingertip (landmark 8), the other tips sit well clear of the keys.
+        landmark = [SimpleNamespace(x=x, y=y + 0.15, z=0.0) for _ in range(21)]
+        landmark[8] = SimpleNamespace(x=x, y=y, z=0.0)
+        hand = SimpleNamespace(landmark=landmark)
+        label = SimpleNamespace(classification=[SimpleNamespace(label="Right")])
+        return SimpleNamespace(multi_hand_landmarks=[hand], multi_handedness=[label])
+
+    def close(self):
+        pass
+
+# Current resident set size of this process in bytes (Linux /proc, with a getrusage fallback).
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+# Collects per-frame metrics from PianoApp.on_frame and turns them into periodic samples.
+# audio: the app's AudioEngine (or None), whose stats() are read at every sample.
+class Sampler:
+    def __init__(self, window, audio=None):
+        self.window = window
+        self.audio = audio
+        self.lock = threading.Lock()
+        self.loop_times = []
+        self.latest = {}
+        self.frames = 0
+        self.samples = []
+        self.start = time.perf_counter()
+
+    def on_frame(self, metrics):
+        with self.lock:
+            self.loop_times.append(metrics["loop_time"])
+            self.latest = metrics
+            self.frames += 1
+
+    # Takes one sample: memory, loop latency since the previous sample, and the app's queue depths.
+    def sample(self):
+        with self.lock:
+            times, self.loop_times = self.loop_times, []
+            latest = dict(self.latest)
+            frames = self.frames
+
+        traced, _ = tracemalloc.get_traced_memory()
+        row = {
+            "elapsed": round(time.perf_counter() - self.start, 2),
+            "frames": frames,
+            "traced_mb": traced / 1e6,
+            "rss_mb": rss_bytes() / 1e6,
+            "loop_p50_ms": float(np.percentile(times, 50)) * 1000 if times else None,
+            "loop_p95_ms": float(np.percentile(times, 95)) * 1000 if times else None,
+            "held_keys": latest.get("held_keys", 0),
+            "tracked_fingers": latest.get("tracked_fingers", 0),
+            "active_voices": latest.get("active_voices", 0),
+            "js_calls": self.window.calls,
+        }
+        # Synth voices (release tails included), stolen voices and the synth's load, straight from the engine.
+        if self.audio:
+            audio = self.audio.stats()
+            row["active_voices"] = audio["active_voices"]
+            row["voices_stolen"] = audio["voices_stolen"]
+            row["synth_cpu_load"] = audio["cpu_load"]
+        self.samples.append(row)
+        return row
+
+# Compares the start and the end of the run. Returns a list of failure messages (empty = passed).
+def check_drift(samples, warmup, max_mem_growth_mb, max_rss_growth_mb, max_latency_growth, max_voices):
+    steady = [s for s in samples if s["elapsed"] >= warmup and s["loop_p95_ms"] is not None]
+    if len(steady) < 4:
+        return ["Not enough samples after warm-up (run longer or sample more often)"]
+
+    # Medians of the first and last few samples, so one slow sample does not decide the result.
+    n = max(2, len(steady) // 5)
+    head, tail = steady[:n], steady[-n:]
+
+    def median(rows, key):
+        return float(np.median([r[key] for r in rows]))
+
+    failures = []
+    mem_growth = median(tail, "traced_mb") - median(head, "traced_mb")
+    if mem_growth > max_mem_growth_mb:
+        failures.append(f"Python heap grew by {mem_growth:.1f} MB (limit {max_mem_growth_mb} MB)")
+
+    rss_growth = median(tail, "rss_mb") - median(head, "rss_mb")
+    if rss_growth > max_rss_growth_mb:
+        failures.append(f"RSS grew by {rss_growth:.1f} MB (limit {max_rss_growth_mb} MB)")
+
+    # Compares the median loop time of the first and last windows: a single window's p95 swings too much from one
+    # run to the next to be a fair test. Small absolute changes (under 3 ms) are noise, not drift.
+    p50_head, p50_tail = median(head, "loop_p50_ms"), median(tail, "loop_p50_ms")
+    if p50_tail > p50_head * max_latency_growth and p50_tail - p50_head > 3.0:
+        failures.append(f"Median loop latency went from {p50_head:.1f} ms to {p50_tail:.1f} ms")
+
+    peak_voices = max(s["active_voices"] for s in steady)
+    if peak_voices > max_voices:
+        failures.append(f"{peak_voices} voices were sounding at once (limit {max_voices})")
+    return failures
+
+def run_soak(
+    duration,
+    interval=10.0,
+    warmup=30.0,
+    recording=None,
+    log_path=None,
+    max_mem_growth_mb=20.0,
+    max_rss_growth_mb=100.0,
+    max_latency_growth=1.5,
+    max_voices=8,
+    inference_process=False,
+    quality="2",
+):
+    # Stubs the synthesizer and keeps the database in a temporary folder (removed at the end).
+    audio_engine.Synth = NullSynth
+    with tempfile.TemporaryDirectory(prefix="piano_soak_") as tmp_dir:
+        main.MusicDB = lambda: MusicDB(os.path.join(tmp_dir, "soak.db"))
+
+        # The quality level is fixed by default, so the governor's steps are not mistaken for drift.
+        app = main.PianoApp(inference_process=inference_process, quality=quality)
+        app.window = StubWindow()
+        app.hands_factory = SyntheticHands
+        app._open_capture = (lambda: LoopingCapture(recording)) if recording else SyntheticCapture
+
+        sampler = Sampler(app.window, app.audio)
+        app.on_frame = sampler.on_frame
+
+        tracemalloc.start()
+        app.running = True
+        loop = threading.Thread(target=app._cv_loop, daemon=True)
+        loop.start()
+
+        log = open(log_path, "w") if log_path else None
+        print(f"Soak test running for {duration:.0f}s (sample every {interval:.0f}s, warm-up {warmup:.0f}s)...")
+        try:
+            end = time.perf_counter() + duration
+            while time.perf_counter() < end and loop.is_alive():
+                time.sleep(min(interval, max(0.0, end - time.perf_counter())))
+                row = sampler.sample()
+                print(json.dumps(row))
+                if log:
+                    log.write(json.dumps(row) + "\n")
+                    log.flush()
+        finally:
+            app.running = False
+            loop.join(timeout=10)
+            tracemalloc.stop()
+            if log:
+                log.close()
+            # Closes the database so its folder can be removed.
+            if app.db:
+                app.db.conn.close()
+
+    failures = check_drift(sampler.samples, warmup, max_mem_growth_mb, max_rss_growth_mb, max_latency_growth, max_voices)
+    if not loop.is_alive() and sampler.frames == 0:
+        failures.append("The CV loop did not process any frames")
+    return sampler.samples, failures
+
+# Ensures the function only runs if the file is executed directly.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak test for the CV loop")
+    parser.add_argument("--duration", type=float, default=3600, help="seconds to run (default: %(default)s)")
+    parser.add_argument("--interval", type=float, default=10, help="seconds between samples (default: %(default)s)")
+    parser.add_argument("--warmup", type=float, default=30, help="seconds ignored at the start (default: %(default)s)")
+    parser.add_argument("--recording", metavar="DIR", help="loop this recording instead of synthetic frames")
+    parser.add_argument("--log", metavar="FILE", help="write every sample to FILE (JSON lines)")
+    parser.add_argument("--max-mem-growth-mb", type=float, default=20.0)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=100.0)
+    parser.add_argument("--max-latency-growth", type=float, default=1.5, help="allowed median latency ratio end/start")
+    parser.add_argument("--max-voices", type=int, default=8)
+    parser.add_argument("--inference-process", action="store_true", help="run hand tracking in a worker process")
+    parser.add_argument("--quality", default="2", help="quality level 0-4, or auto (default: %(default)s)")
+    args = parser.parse_args()
+
+    samples, failures = run_soak(
+        args.duration,
+        args.interval,
+        args.warmup,
+        args.recording,
+        args.log,
+        args.max_mem_growth_mb,
+        args.max_rss_growth_mb,
+        args.max_latency_growth,
+        args.max_voices,
+        args.inference_process,
+        args.quality,
+    )
+
+    # Prints the verdict and exits non-zero on drift (so CI marks the job as failed).
+    if failures:
+        print("SOAK TEST FAILED:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print(f"Soak test passed ({len(samples)} samples).")
@@ -2,10 +2,12 @@
 
 import os
 import sys
+import argparse
+import json
 import time
 import threading
-import base64
 import ctypes
+from functools import partial
 
 # Disables TensorFlow logs
 os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
@@ -25,15 +27,24 @@ if os.name == "nt":
 
 import cv2
 import numpy as np
-import mediapipe as mp
 import webview
 
 # Add the parent directory to Python system's path so we can import 'src'.
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src.piano_logic import PianoMapper
+from src.piano_logic import PianoMapper, IDENTITY_CONFIG, note_to_midi
 from src.audio_engine import AudioEngine
 from src.db_manager import MusicDB
+from src.frame_buffers import FrameBufferPool, encode_jpeg_base64
+from src.markers import make_marker_detector
+from src.hands import FINGERTIP_IDS, HandDetector, draw_hand, mediapipe_hands
+from src.inference_worker import ProcessHandDetector
+from src.governor import FrameGovernor, QUALITY_LEVELS, DEFAULT_LEVEL
+from src.landmark_cache import LandmarkCache
+from src.recorder import RecordingWriter, RecordingCapture, RecordedDetections
+from src.overlay import KeyOverlay, build_overlay_message
+from src.finger_tracker import FingerTracker, fingertip_ids
+from src.practice import StreamingAligner, load_expected_notes
 
 # Defines signal_ui_ready which web/script.js calls to trigger start_camera.
 class JSApi:
@@ -41,17 +52,65 @@ class JSApi:
         self._app = app_instance
     def signal_ui_ready(self):
         self._app.start_camera()
+    # Called by web/script.js when the page is hidden or shown again.
+    def set_preview_visible(self, visible):
+        self._app.preview_visible = bool(visible)
 
 class PianoApp:
-    def __init__(self):
+    # record_path: directory to record the session into. replay_path: recording to play back instead of the camera.
+    # replay_inference: replays run hand tracking and marker detection on the frames again, instead of using the
+    # landmarks and markers recorded with them. landmark_cache_path: SQLite file caching hand landmarks between
+    # such replays (None disables it).
+    # draw_skeleton: draws the hand skeletons on the preview (turn off to save drawing time).
+    # client_overlay: lets web/script.js draw keys, hits and hands on a canvas instead of burning them into the JPEG.
+    # video_every / video_scale: send the video every N frames at this scale (the overlay is sent every frame).
+    # inference_process: runs hand tracking in a worker process (src/inference_worker.py) instead of this one.
+    # quality: "auto" lets FrameGovernor pick the level to hold target_fps, or a fixed index into QUALITY_LEVELS.
+    def __init__(
+        self,
+        record_path=None,
+        replay_path=None,
+        replay_inference=False,
+        landmark_cache_path=None,
+        draw_skeleton=True,
+        client_overlay=True,
+        video_every=2,
+        video_scale=1.0,
+        max_polyphony=24,
+        practice_path=None,
+        inference_process=False,
+        quality="auto",
+        target_fps=30,
+    ):
         self.window = None
+
+        # Builds the hand model (defaults to MediaPipe Hands). Tests and the soak harness swap in their own.
+        self.hands_factory = None
+        # Optional callback, called after every frame with a dict of loop metrics (see _cv_loop).
+        self.on_frame = None
+        self.record_path = record_path
+        self.replay_path = replay_path
+        self.replay_inference = replay_inference
+        self.landmark_cache_path = landmark_cache_path
+        self.draw_skeleton = draw_skeleton
+        self.client_overlay = client_overlay
+        self.video_every = max(1, int(video_every))
+        self.video_scale = video_scale
+        self.inference_process = inference_process
+        self.quality = quality
+        self.target_fps = target_fps
+        # False while the window is minimized or hidden. Nothing is drawn or encoded then.
+        self.preview_visible = True
         self.running = False
         self.shutting_down = False
         self.logic = PianoMapper()
 
+        # Practice mode: follows a target piece (MIDI or text file) and scores every played note.
+        self.practice = StreamingAligner(load_expected_notes(practice_path)) if practice_path else None
+
         # Initialize audio
         try:
-            self.audio = AudioEngine()
+            self.audio = AudioEngine(max_polyphony=max_polyphony)
         except:
             self.audio = None
 
@@ -62,24 +121,6 @@ class PianoApp:
         except:
             self.db = None
 
-        # Mathematically builds the list FULL_88_KEYS containing every note from A0 to C8.
-        self.FULL_88_KEYS = []
-        notes = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
-        self.FULL_88_KEYS.extend(["A0", "A#0", "B0"])
-        for octave in range(1, 8):
-            for note in notes:
-                self.FULL_88_KEYS.append(f"{note}{octave}")
-        self.FULL_88_KEYS.append("C8")
-
-        # Hardcodes the mapping. This ensures Perfect Pitch mapping across the whole keyboard.
-        self.SHEET_MAP = {}
-        self.SHEET_MAP[0] = self.FULL_88_KEYS[0:15]
-        self.SHEET_MAP[2] = self.FULL_88_KEYS[15:31]
-        self.SHEET_MAP[4] = self.FULL_88_KEYS[30:43]
-        self.SHEET_MAP[6] = self.FULL_88_KEYS[45:62]
-        self.SHEET_MAP[8] = self.FULL_88_KEYS[61:77]
-        self.SHEET_MAP[10] = self.FULL_88_KEYS[76:88]
-
     # Launches _cv_loop in a background thread to keep the GUI responsive.
     def start_camera(self):
         if not self.running:
@@ -88,267 +129,371 @@ class PianoApp:
             thread = threading.Thread(target=self._cv_loop, daemon=True)
             thread.start()
 
-    # Opens Camera (Index 0 or 1).
-    def _cv_loop(self):
+    # Opens Camera (Index 0 or 1), or the recording when replaying.
+    def _open_capture(self):
+        if self.replay_path:
+            return RecordingCapture(self.replay_path)
         cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
         if not cap.isOpened():
             cap = cv2.VideoCapture(1)
+        return cap
+
+    def _cv_loop(self):
+        cap = self._open_capture()
+
+        # Picks the quality level (camera resolution, detection resolution, hand model). In "auto" mode the governor
+        # moves it up or down to fit the frame budget. Replays keep one level, so the landmark cache keys stay valid,
+        # and so do recordings, since every frame of a recording must have the same size.
+        auto_quality = self.quality == "auto" and not self.replay_path and not self.record_path
+        governor = FrameGovernor(self.target_fps) if auto_quality else None
+        quality = governor.settings if governor else QUALITY_LEVELS[DEFAULT_LEVEL if self.quality == "auto" else int(self.quality)]
+
+        # Sets the camera resolution (1280x720 by default).
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, quality["capture"][0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, quality["capture"][1])
 
-        # Sets 1280x720 resolution.
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        # Replays feed the recorded markers and hands straight into the mapping and trigger logic, unless they
+        # were asked to run the models again.
+        recorded = RecordedDetections(cap) if isinstance(cap, RecordingCapture) and not self.replay_inference else None
+        inference_process = self.inference_process and recorded is None
 
-        # Initializes MediaPipe Hands.
-        # Configures to look for a maximum of 2 hands and uses a simple, fast tracking model.
-        mp_hands = mp.solutions.hands.Hands(
-            min_detection_confidence=0.6,
-            min_tracking_confidence=0.6,
-            max_num_hands=2,
-            model_complexity=0,
-        )
+        # Replays that run inference reuse cached landmarks for frames MediaPipe has already seen with the same settings.
+        cache = LandmarkCache(self.landmark_cache_path) if self.landmark_cache_path and recorded is None else None
+        detector = recorded or self._make_detector(quality, cache)
 
         # Loads the ArUco 4x4 dictionary (the tyoe of markers you printed).
         aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
-        aruco_params = cv2.aruco.DetectorParameters()
+        detect_markers = recorded.detect_markers if recorded else make_marker_detector(aruco_dict, cv2.aruco.DetectorParameters())
 
-        # Remembers what note each finger was playing last frame.
-        finger_states = {}
+        # Preallocated preview/RGB buffers reused by every frame. MediaPipe's RGB image is sized by the quality level.
+        buffers = FrameBufferPool((854, 480), quality["detect"])
 
-        # Tracks which page we are looking at.
+        # Writes raw frames plus markers, landmarks and notes when recording.
+        recorder = RecordingWriter(self.record_path) if self.record_path else None
+
+        # Tracks which page we are looking at. The keys on each page come from self.logic (PianoMapper).
         current_sheet_id = -1
+        # The sheet whose note names the browser overlay already has.
+        sent_sheet_id = None
         active_keys_list = []
         frame_count = 0
+        # Frames run at each quality level and how often the governor changed level (reported when the loop stops).
+        level_frames = [0] * len(QUALITY_LEVELS)
+        quality_changes = 0
 
         # Define the vertical Zig-Zag hit zones.
         OFFSET_BLACK = 90
         OFFSET_WHITE = 130
         # Defines how close a finger needs to be to trigger a note.
         HIT_RADIUS = 15
+        # A held key is only released once the finger moves further away than this (stops retriggers at the edge).
+        RELEASE_RADIUS = 20
+        # Shortest time (seconds) a key stays down.
+        MIN_DWELL = 0.06
+
+        # Remembers what note each finger of each hand is holding down.
+        finger_tracker = FingerTracker(HIT_RADIUS, RELEASE_RADIUS, MIN_DWELL)
+
+        # The grey key circles, rendered once per sheet pose and stamped onto each frame.
+        key_overlay = KeyOverlay(HIT_RADIUS)
 
         # Holds the per-page calibration to fix the camera distortion.
-        # Define specific padding for each sheet ID to fix mismatches.
+        # The key positions themselves come from the printed geometry (PianoMapper), so these start neutral.
         # 'pad_l': Left padding: Moves keys RIGHT (Pushing from left)
         # 'pad_r': Right padding: Moves keys LEFT (Pushing from right)
         # 'bias': 1.0 is linear. 0.95 pushes left, 1.05 pushes right.
         SHEET_CONFIG = {
-            # Page 1 (Base/Low Notes) - Usually standard
-            0: {"pad_l": 0.06, "pad_r": 0.06, "bias": 1.0},
-            # Page 2 - Usually standard
-            2: {"pad_l": 0.06, "pad_r": 0.06, "bias": 1.0},
-            # Page 3 (The Problematic Sheet) - Mismatch Fix
-            # Increased pad_l to push keys right, decreased pad_r slightly
-            4: {"pad_l": 0.08, "pad_r": 0.04, "bias": 1.0},
+            # Page 1 (Base/Low Notes)
+            0: {"pad_l": 0.0, "pad_r": 0.0, "bias": 1.0},
+            # Page 2
+            2: {"pad_l": 0.0, "pad_r": 0.0, "bias": 1.0},
+            # Page 3
+            4: {"pad_l": 0.0, "pad_r": 0.0, "bias": 1.0},
             # Page 4
-            6: {"pad_l": 0.06, "pad_r": 0.06, "bias": 1.0},
+            6: {"pad_l": 0.0, "pad_r": 0.0, "bias": 1.0},
             # Page 5
-            8: {"pad_l": 0.06, "pad_r": 0.06, "bias": 1.0},
+            8: {"pad_l": 0.0, "pad_r": 0.0, "bias": 1.0},
             # Page 6 (High Notes)
-            10: {"pad_l": 0.06, "pad_r": 0.06, "bias": 1.0},
+            10: {"pad_l": 0.0, "pad_r": 0.0, "bias": 1.0},
         }
         # Default fallback
-        DEFAULT_CONFIG = {"pad_l": 0.06, "pad_r": 0.06, "bias": 1.0}
-
-        # Starts the continuous while loop.
-        while self.running and not self.shutting_down:
-
-            # Reads a frame.
-            ret, raw_frame = cap.read()
-
-            # If the frame is empty, waits 0.1 seconds, and then skips the rest of the loop.
-            if not ret:
-                time.sleep(0.1)
-                continue
-
-            # Increments the frame counter.
-            frame_count += 1
-            h, w, _ = raw_frame.shape
-
-            # Detects ArUco markers. Gets the ID. Normalizes it (even numbers).
-            corners, ids, _ = cv2.aruco.detectMarkers(raw_frame, aruco_dict, parameters=aruco_params)
-            detected_id_display = "None"
-            current_config = DEFAULT_CONFIG
-
-            # Finds the lowest Marker ID.
-            if ids is not None and len(ids) > 0:
-                raw_id = int(np.min(ids))
-                # Normalizes odd numbers to even numbers.
-                normalized_id = raw_id if raw_id % 2 == 0 else raw_id - 1
-                detected_id_display = str(normalized_id)
-                # Fetches calibration for this specific sheet.
-                current_config = SHEET_CONFIG.get(normalized_id, DEFAULT_CONFIG)
-
-                # If the sheet changed from the last frame, it updates the active_keys_list from the SHEET_MAP.
-                if normalized_id != current_sheet_id:
-                    current_sheet_id = normalized_id
-                    if normalized_id in self.SHEET_MAP:
-                        active_keys_list = self.SHEET_MAP[normalized_id]
-                    else:
-                        active_keys_list = []
-
-            # Flips the image so it acts like a mirror (intuitive for users).
-            display_frame = cv2.flip(raw_frame, 1)
-            # Resizes it to 854x480 for better performance.
-            display_frame = cv2.resize(display_frame, (854, 480))
-            dh, dw, _ = display_frame.shape
-            # Converts color space to RGB for MediaPipe.
-            rgb = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
-
-            status = f"Sheet:{detected_id_display} Keys:{len(active_keys_list)}"
-            is_locked = False
-            key_targets = []
-
-            # Calculates the center points of the ArUco markers.
-            if ids is not None and len(ids) >= 2 and len(active_keys_list) > 0:
-                centers = []
-                for c in corners:
-                    cx = np.mean(c[0][:, 0])
-                    cy = np.mean(c[0][:, 1])
-                    sx, sy = dw / w, dh / h
-                    centers.append((dw - (cx * sx), cy * sy))
-
-                # Sorts the center points of the ArUco markers left-to-right.
-                centers.sort(key=lambda p: p[0])
-                p_left, p_right = centers[0], centers[-1]
-
-                # Calculates the 2D vector (bx, by) connecting them.
-                bx = p_right[0] - p_left[0]
-                by = p_right[1] - p_left[1]
-
-                # Calculates the perpendicular vector (prep_x, perp_y) pointing "downward" on the paper to offset the keys.
-                perp_x = by
-                perp_y = -bx
-                mag = (perp_x ** 2 + perp_y ** 2) ** 0.5
-                if mag > 0:
-                    perp_x /= mag
-                    perp_y /= mag
-                else:
-                    perp_x, perp_y = 0, -1
-
-                num_keys = len(active_keys_list)
-
-                # Extract and use the specific values from the active config dictionary.
-                PADDING_LEFT = current_config["pad_l"]
-                PADDING_RIGHT = current_config["pad_r"]
-                LINEARITY_BIAS = current_config["bias"]
-
-                # Loops through the number of active keys.
-                for i in range(num_keys):
-
-                    # This separates the hit zones vertically.
-                    note_name = active_keys_list[i]
-
-                    # If note has #, offset is OFFSET_BLACK (90px).
-                    if "#" in note_name:
-                        current_offset = OFFSET_BLACK
-                    # If natural, offset is OFFSET_WHITE (130px).
-                    else:
-                        current_offset = OFFSET_WHITE
-
-                    # Calculates raw percentage.
-                    u_raw = (i + 0.5) / num_keys
-                    # Applies the Linearity Bias (Perspective Correction).
-                    u_biased = u_raw ** LINEARITY_BIAS
-                    # Calculates the usable space (applies Independent Padding).
-                    usable_width = 1.0 - (PADDING_LEFT + PADDING_RIGHT)
-                    # Squeezes the key into its final coordinate percentage.
-                    u = PADDING_LEFT + (u_biased * usable_width)
-                    # Finds exact pixel coordinates on the screen (project to screen coordinates).
-                    base_x = p_left[0] + bx * u
-                    base_y = p_left[1] + by * u
-                    center_x = int(base_x + perp_x * current_offset)
-                    center_y = int(base_y + perp_y * current_offset)
-                    # Saves the target to key_targets.
-                    key_targets.append({"pos": (center_x, center_y), "note": note_name, "hit": False})
-
-                    # Draws a faint grey circle at target positions on the screen.
-                    cv2.circle(
-                        display_frame,
-                        (center_x, center_y),
-                        HIT_RADIUS,
-                        (160, 160, 160),
-                        1,
-                    )
-                is_locked = True
-
-            # Analyzes the frame for hands.
-            res = mp_hands.process(rgb)
-            # If hands are found, it draws the skeletal skeleton over them.
-            if res.multi_hand_landmarks:
-                for hand_lm in res.multi_hand_landmarks:
-                    mp.solutions.drawing_utils.draw_landmarks(
-                        display_frame, hand_lm, mp.solutions.hands.HAND_CONNECTIONS
+        DEFAULT_CONFIG = IDENTITY_CONFIG
+
+        try:
+            # Starts the continuous while loop.
+            while self.running and not self.shutting_down:
+
+                # Reads a frame.
+                ret, raw_frame = cap.read()
+
+                # Stops once a replayed recording runs out of frames.
+                if not ret and isinstance(cap, RecordingCapture) and cap.finished:
+                    break
+
+                # If the frame is empty, waits 0.1 seconds, and then skips the rest of the loop.
+                if not ret:
+                    time.sleep(0.1)
+                    continue
+
+                # Increments the frame counter.
+                frame_count += 1
+                loop_start = time.perf_counter()
+                # Replays use the recorded time, so dwell and speed behave as they did live.
+                recorded_time = getattr(cap, "timestamp", None)
+                frame_time = time.time() if recorded_time is None else recorded_time
+                played_notes = []
+                h, w, _ = raw_frame.shape
+
+                # Detects ArUco markers. Gets the ID. Normalizes it (even numbers).
+                corners, ids, _ = detect_markers(raw_frame)
+                detected_id_display = "None"
+                current_config = DEFAULT_CONFIG
+
+                # Finds the lowest Marker ID.
+                if ids is not None and len(ids) > 0:
+                    raw_id = int(np.min(ids))
+                    # Normalizes odd numbers to even numbers.
+                    normalized_id = raw_id if raw_id % 2 == 0 else raw_id - 1
+                    detected_id_display = str(normalized_id)
+                    # Fetches calibration for this specific sheet.
+                    current_config = SHEET_CONFIG.get(normalized_id, DEFAULT_CONFIG)
+
+                    # If the sheet changed from the last frame, it updates the active_keys_list from the PianoMapper.
+                    if normalized_id != current_sheet_id:
+                        current_sheet_id = normalized_id
+                        self.logic.set_sheet_by_id(normalized_id)
+                        active_keys_list = self.logic.active_keys
+
+                # Mirrors, resizes to 854x480 and converts to RGB for MediaPipe, writing into the pooled buffers.
+                # With a worker process, the RGB copy is written straight into its shared-memory ring.
+                ring_slot = detector.frame_buffer(buffers.rgb_shape) if inference_process else None
+                display_frame, rgb = buffers.prepare(raw_frame, ring_slot)
+                dh, dw, _ = display_frame.shape
+                # The worker starts on the hands right away, while this process works out the key targets.
+                hands_ticket = detector.submit(rgb) if inference_process else None
+
+                # Burns the overlay into the frame only in server mode, and skips all drawing while nobody can see the preview.
+                draw_preview = self.preview_visible and not self.client_overlay
+                hit_indices = []
+
+                status = f"Sheet:{detected_id_display} Keys:{len(active_keys_list)}"
+                is_locked = False
+                key_targets = []
+
+                # Calculates the center points of the ArUco markers.
+                if ids is not None and len(ids) >= 2 and len(active_keys_list) > 0:
+                    centers = []
+                    for c in corners:
+                        cx = np.mean(c[0][:, 0])
+                        cy = np.mean(c[0][:, 1])
+                        sx, sy = dw / w, dh / h
+                        centers.append((dw - (cx * sx), cy * sy))
+
+                    # Sorts the center points of the ArUco markers left-to-right.
+                    centers.sort(key=lambda p: p[0])
+                    p_left, p_right = centers[0], centers[-1]
+
+                    # Projects every printed key center onto the screen (with the zig-zag offsets and this sheet's calibration).
+                    positions = self.logic.key_targets(p_left, p_right, current_config, OFFSET_WHITE, OFFSET_BLACK)
+
+                    # Loops through the active keys.
+                    for note_name, (px, py) in zip(active_keys_list, positions):
+                        center_x, center_y = int(px), int(py)
+                        # Saves the target to key_targets.
+                        key_targets.append({"pos": (center_x, center_y), "note": note_name, "hit": False})
+
+                    # Draws the faint grey circles at the target positions (cached while the sheet holds still).
+                    if draw_preview:
+                        key_overlay.draw(display_frame, positions)
+                    is_locked = True
+
+                # Analyzes the frame for hands (landmarks has shape (num_hands, 21, 3)).
+                landmarks, handedness = detector.collect(hands_ticket) if inference_process else detector.process(rgb)
+                # If hands are found, it draws the skeletal skeleton over them.
+                if draw_preview and self.draw_skeleton:
+                    for hand_lm in landmarks:
+                        draw_hand(display_frame, hand_lm)
+
+                # Collects the 4 fingertips (8=Index, 12=Middle, 16=Ring, 20=Pinky) of every hand.
+                # Converts normalized MediaPipe coordinates (0.0 to 1.0) into real pixel coordinates and keeps z for depth gating.
+                fingertips = {}
+                if is_locked:
+                    for hand_lm, tip_ids in zip(landmarks, fingertip_ids(handedness, FINGERTIP_IDS)):
+                        for fid in tip_ids:
+                            tip = hand_lm[fid[1]]
+                            fingertips[fid] = (tip[0] * dw, tip[1] * dh, tip[2])
+
+                # Runs the per-hand, per-finger press/release state machine.
+                # Without a locked sheet there are no targets, so held keys are released.
+                events = finger_tracker.update(
+                    fingertips, [btn["pos"] for btn in key_targets], [btn["note"] for btn in key_targets], frame_time
+                )
+                for event in events:
+                    if event.kind == "off":
+                        # Releases the note in the synth (keeps voices from piling up).
+                        if self.audio:
+                            self.audio.note_off(event.note)
+                        continue
+                    active_note = event.note
+                    if self.audio:
+                        # Plays audio, louder the faster the finger came down.
+                        self.audio.note_on(active_note, AudioEngine.velocity_from_speed(event.speed))
+                    if self.db:
+                        # Logs it to the database.
+                        self.db.log_note(self.session, active_note)
+                    # Sends a JavaScript command to update the HTML UI.
+                    self._send_js(f"highlightNoteString('{active_note}')")
+                    played_notes.append(active_note)
+                    if self.practice:
+                        self._score_practice_note(active_note, event.time)
+
+                # Marks every key that is held down as a hit.
+                held_notes = set(finger_tracker.pressed().values())
+                for k, btn in enumerate(key_targets):
+                    if btn["note"] not in held_notes:
+                        continue
+                    btn["hit"] = True
+                    hit_indices.append(k)
+                    if draw_preview:
+                        tx, ty = btn["pos"]
+                        # Draws a solid green circle.
+                        cv2.circle(
+                            display_frame,
+                            (tx, ty),
+                            HIT_RADIUS,
+                            (0, 255, 0),
+                            -1,
+                        )
+                        # Draws text to show visual feedback.
+                        cv2.putText(
+                            display_frame,
+                            btn["note"],
+                            (tx - 10, ty - 20),
+                            cv2.FONT_HERSHEY_SIMPLEX,
+                            0.5,
+                            (0, 255, 0),
+                            2,
+                        )
+
+                # Saves the raw frame with everything the app saw and played on it.
+                if recorder:
+                    recorder.append(raw_frame, corners, ids, landmarks, handedness, played_notes, frame_time)
+
+                # Sends the key targets, hits and hands every frame so the browser can draw them over the video.
+                if self.client_overlay and self.preview_visible and not self.shutting_down:
+                    # The note names only travel when the sheet changes.
+                    names = active_keys_list if current_sheet_id != sent_sheet_id else None
+                    sent_sheet_id = current_sheet_id
+                    positions = [btn["pos"] for btn in key_targets]
+                    hands = landmarks if self.draw_skeleton else landmarks[:0]
+                    msg = build_overlay_message(dw, dh, positions, hit_indices, hands, HIT_RADIUS, names)
+                    self._send_js(f"updateOverlay({msg})")
+
+                # Updates the video every video_every frames (2 by default) for performance.
+                if frame_count % self.video_every == 0 and not self.shutting_down:
+                    # Encodes the OpenCV frame into a JPEG and converts it to a Base64 string (only if it can be seen).
+                    b64 = encode_jpeg_base64(self._video_frame(buffers, display_frame)) if self.preview_visible else None
+                    # Sends to JavaScript via evaluate_js to render the video on the webpage.
+                    if b64:
+                        self._send_js(f"updateFrame('{b64}')")
+                    self._send_js(f"updateStatus('{status}', {'false' if is_locked else 'true'})")
+
+                # Reports how long this frame took and how much state is being held, for monitoring long sessions.
+                loop_time = time.perf_counter() - loop_start
+                if self.on_frame:
+                    self.on_frame(
+                        {
+                            "frame": frame_count,
+                            "loop_time": loop_time,
+                            "quality": governor.level if governor else None,
+                            "quality_changes": quality_changes,
+                            "held_keys": len(finger_tracker.pressed()),
+                            "tracked_fingers": len(finger_tracker.fingers),
+                            "active_voices": self.audio.active_voices if self.audio else 0,
+                            "notes": len(played_notes),
+                        }
                     )
 
-                    # Loops through the 4 fingertip landmark IDs (8=Index, 12=Middle, 16=Ring, 20=Pinky).
-                    for tip_idx in [8, 12, 16, 20]:
-                        # Converts normalized MediaPipe coordinates (0.0 to 1.0) into real pixel coordinates (fx, fy).
-                        tip = hand_lm.landmark[tip_idx]
-                        fx, fy = int(tip.x * dw), int(tip.y * dh)
-                        fid = f"{tip_idx}"
-                        if is_locked:
-                            active_note = None
-
-                            # Calculates Euclidean distance between fingertip and every key target.
-                            for btn in key_targets:
-                                tx, ty = btn["pos"]
-                                dist = ((fx - tx) ** 2 + (fy - ty) ** 2) ** 0.5
-
-                                # If distance < HIT_RADIUS:
-                                if dist < HIT_RADIUS:
-                                    # Marks it as a hit.
-                                    active_note = btn["note"]
-                                    btn["hit"] = True
-                                    # Draws a solid green circle.
-                                    cv2.circle(
-                                        display_frame,
-                                        (tx, ty),
-                                        HIT_RADIUS,
-                                        (0, 255, 0),
-                                        -1,
-                                    )
-                                    # Draws text to show visual feedback.
-                                    cv2.putText(
-                                        display_frame,
-                                        active_note,
-                                        (tx - 10, ty - 20),
-                                        cv2.FONT_HERSHEY_SIMPLEX,
-                                        0.5,
-                                        (0, 255, 0),
-                                        2,
-                                    )
-                                    # Break out of the loop (a finger can only press one key at a time).
-                                    break
-
-                            # Looks up what note this specific finger was playing in the previous frame.
-                            previous_note = finger_states.get(fid)
-                            if active_note:
-                                # If the finger just hit a new note (different from previous frame for that finger):
-                                if active_note != previous_note:
-                                    if self.audio:
-                                        # Plays audio.
-                                        self.audio.note_on(active_note)
-                                    if self.db:
-                                        # Logs it to the database.
-                                        self.db.log_note(self.session, active_note)
-                                        # Sends a JavaScript command to update the HTML UI.
-                                    self._send_js(f"highlightNoteString('{active_note}')")
-                                    # Updates the finger's current state.
-                                    finger_states[fid] = active_note
-                            # If no note is pressed, clears the state to None.
-                            else:
-                                finger_states[fid] = None
-
-            # Updates the UI every 2 frames for performance.
-            if frame_count % 2 == 0 and not self.shutting_down:
-                # Encodes the OpenCV frame into a JPEG.
-                _, buf = cv2.imencode(".jpg", display_frame)
-                # Converts it to a Base64 string
-                b64 = base64.b64encode(buf).decode("utf-8")
-                # Sends to JavaScript via evaluate_js to render the video on the webpage.
-                self._send_js(f"updateFrame('{b64}')")
-                self._send_js(f"updateStatus('{status}', {'false' if is_locked else 'true'})")
-
-        cap.release()
+                # Steps the quality up or down when frames keep running over (or well under) the budget.
+                if governor:
+                    level_frames[governor.level] += 1
+                new_quality = governor.update(loop_time) if governor else None
+                if new_quality:
+                    quality_changes += 1
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, new_quality["capture"][0])
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, new_quality["capture"][1])
+                    buffers.detect_size = new_quality["detect"]
+                    # A different model or hand count needs a new Hands object (and, with a worker, a new ring).
+                    # The new worker carries on the old one's counters, so the exit report covers the whole session.
+                    # Closing the detector also closes its landmark cache, so the new one opens the cache again.
+                    detector.close()
+                    cache = LandmarkCache(self.landmark_cache_path) if cache else None
+                    previous, detector = detector, self._make_detector(new_quality, cache)
+                    if inference_process:
+                        detector.continue_stats(previous)
+
+        finally:
+            # Releases the camera, the hand model and the recording even if the loop fails.
+            cap.release()
+            detector.close()
+            # Reports how the governor spread the session over the quality levels.
+            if governor:
+                spread = ", ".join(f"level {i}: {n}" for i, n in enumerate(level_frames) if n)
+                print(f"Quality: {quality_changes} level changes, ended at level {governor.level} (frames per {spread})")
+            # Reports how fast the worker answered and how much CPU time it took off this process.
+            if inference_process:
+                stats = detector.stats()
+                print(
+                    f"Hand inference worker: {stats['frames']} frames, round trip p50 {stats['round_trip_ms_p50'] or 0:.1f} ms /"
+                    f" p95 {stats['round_trip_ms_p95'] or 0:.1f} ms, {stats['worker_cpu_s']:.1f} s of CPU moved off the main process"
+                )
+            if self.audio:
+                self.audio.all_notes_off()
+                # Reports what the synth had to do, so voice stealing or a loaded synth shows up after a session.
+                stats = self.audio.stats()
+                load = f", synth load {stats['cpu_load']:.0f}%" if stats["cpu_load"] is not None else ""
+                print(
+                    f"Audio: {stats['notes_played']} notes played, up to {stats['peak_held_notes']} held at once,"
+                    f" {stats['voices_stolen']} voices stolen{load}"
+                )
+            if recorder:
+                recorder.close()
+
+    # Builds the hand detector for a quality level.
+    # Runs the model in a worker process (frames are shared through a ring buffer) or in this process.
+    def _make_detector(self, quality, cache):
+        # MediaPipe Hands settings. The confidences are fixed, the model and hand count come from the quality level.
+        hands_config = {
+            "min_detection_confidence": 0.6,
+            "min_tracking_confidence": 0.6,
+            "max_num_hands": quality["max_num_hands"],
+            "model_complexity": quality["model_complexity"],
+        }
+        hands_factory = self.hands_factory or partial(mediapipe_hands, hands_config)
+        if self.inference_process:
+            return ProcessHandDetector(hands_factory, hands_config, cache)
+        return HandDetector(hands_factory, hands_config, cache)
+
+    # Aligns a played note against the target piece, stores the result and shows it in the UI.
+    def _score_practice_note(self, note, played_time):
+        midi = note_to_midi(note)
+        if midi is None:
+            return
+        result = self.practice.add(midi, played_time)
+        if self.db:
+            self.db.log_practice_result(self.session, result)
+        msg = dict(result._asdict(), accuracy=self.practice.accuracy)
+        self._send_js(f"updatePractice({json.dumps(msg)})")
+
+    # Shrinks the preview by video_scale (into a pooled buffer) before it is encoded.
+    def _video_frame(self, buffers, display_frame):
+        if self.video_scale >= 1.0:
+            return display_frame
+        dh, dw, _ = display_frame.shape
+        vw, vh = max(1, int(dw * self.video_scale)), max(1, int(dh * self.video_scale))
+        video = buffers.get("video", (vh, vw, 3))
+        cv2.resize(display_frame, (vw, vh), dst=video, interpolation=cv2.INTER_AREA)
+        return video
 
     # Evaluate JavaScript code in the PyWebView window safely.
     def _send_js(self, code):
@@ -367,8 +512,61 @@ class PianoApp:
 
 # Ensures the functions only run if the files is executed directly.
 if __name__ == "__main__":
+    # Reads the optional record/replay arguments.
+    parser = argparse.ArgumentParser(description="CV Paper Piano")
+    parser.add_argument("--record", metavar="DIR", help="record raw frames, markers, landmarks and notes into DIR")
+    parser.add_argument("--replay", metavar="DIR", help="play back a recording instead of opening the camera")
+    parser.add_argument(
+        "--replay-inference",
+        action="store_true",
+        help="run hand tracking and marker detection on the replayed frames instead of using the recorded results",
+    )
+    parser.add_argument(
+        "--landmark-cache",
+        metavar="FILE",
+        default="assets/cache/landmarks.db",
+        help="hand-landmark cache used by --replay-inference (default: %(default)s)",
+    )
+    parser.add_argument("--no-landmark-cache", action="store_true", help="always run hand inference with --replay-inference")
+    parser.add_argument("--no-skeleton", action="store_true", help="do not draw the hand skeletons on the preview")
+    parser.add_argument(
+        "--server-overlay", action="store_true", help="burn the overlay into the video instead of drawing it in the browser"
+    )
+    parser.add_argument("--video-every", type=int, default=2, help="send the video every N frames (default: %(default)s)")
+    parser.add_argument("--video-scale", type=float, default=1.0, help="scale of the video sent to the UI (default: %(default)s)")
+    parser.add_argument("--polyphony", type=int, default=24, help="maximum notes sounding at once (default: %(default)s)")
+    parser.add_argument(
+        "--inference-process", action="store_true", help="run hand tracking in a separate worker process"
+    )
+    parser.add_argument(
+        "--quality",
+        choices=["auto"] + [str(i) for i in range(len(QUALITY_LEVELS))],
+        default="auto",
+        help="camera/detection quality level, 0 (fastest) to 4 (most accurate), or auto (default)",
+    )
+    parser.add_argument("--target-fps", type=float, default=30, help="frame rate auto quality aims for (default: %(default)s)")
+    parser.add_argument("--practice", metavar="FILE", help="practice mode: follow this piece (.mid or a text file of note names)")
+    args = parser.parse_args()
+
+    # Live camera frames never repeat, so the landmark cache is only used for replays that run inference again.
+    cache_path = args.landmark_cache if args.replay and args.replay_inference and not args.no_landmark_cache else None
+
     # Creates the PianoApp instance.
-    app = PianoApp()
+    app = PianoApp(
+        record_path=args.record,
+        replay_path=args.replay,
+        replay_inference=args.replay_inference,
+        landmark_cache_path=cache_path,
+        draw_skeleton=not args.no_skeleton,
+        client_overlay=not args.server_overlay,
+        video_every=args.video_every,
+        video_scale=args.video_scale,
+        max_polyphony=args.polyphony,
+        practice_path=args.practice,
+        inference_process=args.inference_process,
+        quality=args.quality,
+        target_fps=args.target_fps,
+    )
     # Creates the JSApi bridge.
     api = JSApi(app)
     # Creates the webview window pointing to web/index.html.
@@ -376,5 +574,8 @@ if __name__ == "__main__":
     app.window = window
     # Binds the app.quit method to the window's close event.
     window.events.closed += app.quit
+    # Stops drawing the preview while the window is minimized.
+    window.events.minimized += lambda: setattr(app, "preview_visible", False)
+    window.events.restored += lambda: setattr(app, "preview_visible", True)
     # Starts the webview.
     webview.start(debug=False)
\ No newline at end of file
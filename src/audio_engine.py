@@ -1,14 +1,49 @@
 """ This module handles the actual generation of sound using the FluidSynth library. """
 
 import os
+import ctypes
+from collections import OrderedDict
+import fluidsynth
 from fluidsynth import Synth
 
 # Forces the use of 'dsound' (DirectSound) on Windows ('alsa' for Linux and 'coreaudio' for Mac).
 os.environ["SDL_AUDIODRIVER"] = "dsound"
 os.environ["FLUID_AUDIO_DRIVER"] = "dsound"
 
+# Velocity used when the finger speed is unknown (and the old fixed velocity).
+DEFAULT_VELOCITY = 100
+
+# assets/soundfonts/grand_piano.sf2 (or "grand_piano.sf3").
+SOUNDFONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "soundfonts", "grand_piano.sf2")
+
+# Calls a FluidSynth C function that pyfluidsynth does not wrap, on the synth behind a pyfluidsynth Synth.
+# Returns None when it cannot be asked (no such function in this FluidSynth, or a stubbed synth).
+def _synth_query(fs, name, restype):
+    lib = getattr(fluidsynth, "_fl", None)
+    func = getattr(lib, name, None) if lib is not None else None
+    # pyfluidsynth keeps the C pointer as a plain int.
+    handle = getattr(fs, "synth", None)
+    if func is None or not isinstance(handle, int):
+        return None
+    func.restype = restype
+    func.argtypes = [ctypes.c_void_p]
+    value = func(handle)
+    return value if isinstance(value, (int, float)) else None
+
 class AudioEngine:
-    def __init__(self):
+
+    # max_polyphony: how many notes may sound at once. Beyond that the oldest note is released (voice stealing),
+    # so release tails cannot pile up over a long session.
+    def __init__(self, max_polyphony=24):
+        self.max_polyphony = max_polyphony
+
+        # Sounding notes, oldest first: MIDI number -> how many fingers hold it.
+        self.active = OrderedDict()
+
+        # Counters for long-session monitoring (see stats()).
+        self.notes_played = 0
+        self.voices_stolen = 0
+        self.peak_held_notes = 0
 
         # Creates a synthesizer instance.
         self.fs = Synth()
@@ -19,9 +54,8 @@ class AudioEngine:
         except:
             self.fs.start()
 
-        # Calculates the path to assets/soundfonts/grand_piano.sf2 or assets/soundfonts/grand_piano.sf3.
-        current_dir = os.path.dirname(os.path.abspath(__file__))      # Or "grand_piano.sf3"
-        sf2_path = os.path.join(current_dir, "..", "assets", "soundfonts", "grand_piano.sf2")
+        # The path to assets/soundfonts/grand_piano.sf2 or assets/soundfonts/grand_piano.sf3.
+        sf2_path = SOUNDFONT_PATH
 
         # Checks if the file exists. If yes, loads it (sfload) and selects it (program_select). If no, prints a warning.
                     # Or (sf3_path)
@@ -35,16 +69,90 @@ class AudioEngine:
         # Sends a MIDI Control Change message to set Channel 0 volume to Max.
         self.fs.cc(0, 7, 127)
 
-    def note_on(self, note_str):
+    def note_on(self, note_str, velocity=DEFAULT_VELOCITY):
 
         # Converts a string (e.g., "C#4") to a MIDI integer using _note_to_midi.
         midi = self._note_to_midi(note_str)
+        if not midi:
+            return
+
+        # A note that is already sounding (e.g. pressed by a second finger) is struck again.
+        if midi in self.active:
+            self.active[midi] += 1
+            self.active.move_to_end(midi)
+            self.fs.noteoff(0, midi)
+        else:
+            # Steals the oldest notes when the polyphony cap is reached.
+            while len(self.active) >= self.max_polyphony:
+                oldest, _ = self.active.popitem(last=False)
+                self.fs.noteoff(0, oldest)
+                self.voices_stolen += 1
+            self.active[midi] = 1
+
+        # Sends noteon command (Channel 0, MIDI Number, Velocity).
+        self.fs.noteon(0, midi, int(velocity))
+        self.notes_played += 1
+        self.peak_held_notes = max(self.peak_held_notes, len(self.active))
+
+    # Releases a note. It keeps sounding while another finger still holds it.
+    def note_off(self, note_str):
+        midi = self._note_to_midi(note_str)
+        if not midi or midi not in self.active:
+            return
+        self.active[midi] -= 1
+        if self.active[midi] <= 0:
+            del self.active[midi]
+            self.fs.noteoff(0, midi)
+
+    # Releases every sounding note (e.g. when the camera loop stops).
+    def all_notes_off(self):
+        for midi in self.active:
+            self.fs.noteoff(0, midi)
+        self.active.clear()
+
+    # Maps how fast a fingertip approached the key (pixels per second) to a MIDI velocity. Never gets quieter as
+    # the speed goes up: anything up to `slow` (including a finger that stopped on the key) plays `soft`.
+    # Unknown speed (None) falls back to DEFAULT_VELOCITY.
+    @staticmethod
+    def velocity_from_speed(speed, slow=100.0, fast=1500.0, soft=40, loud=127):
+        if speed is None:
+            return DEFAULT_VELOCITY
+        t = min(max((speed - slow) / (fast - slow), 0.0), 1.0)
+        return int(round(soft + t * (loud - soft)))
 
-        # If valid, sends noteon command (Channel 0, MIDI Number, Velocity 100).
-        if midi:
-            self.fs.noteon(0, midi, 100)
+    # Number of notes currently held down.
+    @property
+    def held_notes(self):
+        return len(self.active)
+
+    # Number of voices FluidSynth is rendering, including the release tails of notes already let go.
+    # Falls back to the held notes when FluidSynth cannot be asked.
+    @property
+    def active_voices(self):
+        voices = _synth_query(self.fs, "fluid_synth_get_active_voice_count", ctypes.c_int)
+        return self.held_notes if voices is None else voices
+
+    # FluidSynth's own estimate of its rendering load (percent of real time), or None when it cannot be asked.
+    @property
+    def cpu_load(self):
+        return _synth_query(self.fs, "fluid_synth_get_cpu_load", ctypes.c_double)
+
+    # Snapshot of the counters, so long sessions can be checked for unbounded growth.
+    def stats(self):
+        return {
+            "active_voices": self.active_voices,
+            "held_notes": self.held_notes,
+            "peak_held_notes": self.peak_held_notes,
+            "voices_stolen": self.voices_stolen,
+            "notes_played": self.notes_played,
+            "cpu_load": self.cpu_load,
+        }
 
     def _note_to_midi(self, note):
+
+        # MIDI numbers are passed straight through.
+        if isinstance(note, int):
+            return note
         try:
 
             # A helper function. Defines a list notes_map.
@@ -1,8 +1,28 @@
-""" This handles saving sessions and notes data to a SQLite database. """
+""" This handles saving sessions and notes data to a SQLite database, and exporting or pruning it in bounded chunks. """
 
 import sqlite3
 import os
-from datetime import datetime
+import csv
+import argparse
+from datetime import datetime, date
+import numpy as np
+
+# Tables that can be exported, and the column that links each one to a session.
+EXPORT_TABLES = {"Sessions": "id", "Notes": "session_id", "PracticeResults": "session_id"}
+EXPORT_FORMATS = ("csv", "npz", "parquet")
+
+# Columns exported with another type than the one declared. SQLite does not enforce column types, and
+# Notes.note (declared INTEGER) holds MIDI numbers or note names like "C4" depending on who logged them.
+EXPORT_TYPE_OVERRIDES = {"Notes": {"note": "TEXT"}}
+
+# Rows read per query when exporting or deleting. Memory use depends on this, not on the table size.
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Dates and datetimes are compared as ISO strings (the format the timestamps are stored in).
+def _iso(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
 
 # SQLite wrapper for the Music Database.
 class MusicDB:
@@ -17,7 +37,8 @@ class MusicDB:
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self.create_tables()
 
-    # Creates two tables: Sessions (stores session start time) and Notes (stores every note played, linked to a session).
+    # Creates the tables: Sessions (stores session start time), Notes (stores every note played, linked to a session)
+    # and PracticeResults (how each note played in practice mode compared with the target piece).
     def create_tables(self):
         cur = self.conn.cursor()
         cur.execute(
@@ -38,6 +59,26 @@ class MusicDB:
             )
         """
         )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS PracticeResults (
+                id INTEGER PRIMARY KEY,
+                session_id INTEGER,
+                note TEXT,
+                expected_note TEXT,
+                expected_index INTEGER,
+                correct INTEGER,
+                timing_error REAL,
+                timestamp TEXT
+            )
+        """
+        )
+
+        # Indexes for the export filters and the retention cleanup (without them both scan millions of rows).
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON Sessions (timestamp)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_notes_session ON Notes (session_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_notes_timestamp ON Notes (timestamp)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_practice_session ON PracticeResults (session_id)")
         self.conn.commit()
 
     # Starts a new recording session.
@@ -66,4 +107,195 @@ class MusicDB:
             """,
                 (session_id, note, now),
             )
-            self.conn.commit()
\ No newline at end of file
+            self.conn.commit()
+
+    # Logs how one played note compared with the target piece (a src.practice.PracticeResult).
+    def log_practice_result(self, session_id, result):
+        if session_id:
+            cur = self.conn.cursor()
+            now = datetime.now().isoformat()
+            cur.execute(
+                """
+                INSERT INTO PracticeResults (session_id, note, expected_note, expected_index, correct, timing_error, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                (session_id, result.played, result.expected, result.index, int(result.correct), result.timing_error, now),
+            )
+            self.conn.commit()
+
+    # Builds the WHERE clause shared by the export filters.
+    # start/end filter on the row's own timestamp (start inclusive, end exclusive). session_ids keeps only those sessions.
+    @staticmethod
+    def _filters(table, start=None, end=None, session_ids=None):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_iso(start))
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(_iso(end))
+        if session_ids is not None:
+            session_ids = [int(s) for s in session_ids]
+            clauses.append(f"{EXPORT_TABLES[table]} IN ({', '.join('?' * len(session_ids)) or 'NULL'})")
+            params.extend(session_ids)
+        return clauses, params
+
+    # Returns the (name, declared type) of every column of a table.
+    def columns(self, table):
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        return [(row[1], row[2].upper()) for row in self.conn.execute(f"PRAGMA table_info({table})")]
+
+    # Like columns(), with the export type of columns whose declared type does not describe what they hold
+    # (EXPORT_TYPE_OVERRIDES). Typed exports use this, so every chunk of a table gets the same column types
+    # without scanning the table first.
+    def export_columns(self, table):
+        overrides = EXPORT_TYPE_OVERRIDES.get(table, {})
+        return [(name, overrides.get(name, declared)) for name, declared in self.columns(table)]
+
+    # Yields the rows of a table in id order, chunk_size rows at a time (lists of tuples).
+    # Each chunk is its own short query that resumes after the last id seen (keyset paging), so no read is
+    # held open across chunks and the CV loop can keep writing while a large export runs.
+    def iter_chunks(self, table, start=None, end=None, session_ids=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        names = [name for name, _ in self.columns(table)]
+        clauses, params = self._filters(table, start, end, session_ids)
+        where = "".join(f" AND {c}" for c in clauses)
+        query = f"SELECT {', '.join(names)} FROM {table} WHERE id > ?{where} ORDER BY id LIMIT ?"
+
+        last_id = -1
+        while True:
+            rows = self.conn.execute(query, [last_id, *params, chunk_size]).fetchall()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+    # Streams tables to out_dir in one of EXPORT_FORMATS. Returns {table: number of rows written}.
+    # csv:     <table>.csv
+    # npz:     <table>-00000.npz, <table>-00001.npz, ... one file of column arrays per chunk
+    # parquet: <table>.parquet, one row group per chunk (needs pyarrow)
+    def export(self, out_dir, tables=("Sessions", "Notes"), fmt="csv", start=None, end=None, session_ids=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt} (expected one of {', '.join(EXPORT_FORMATS)})")
+        os.makedirs(out_dir, exist_ok=True)
+        writer = {"csv": _write_csv, "npz": _write_npz, "parquet": _write_parquet}[fmt]
+
+        counts = {}
+        for table in tables:
+            chunks = self.iter_chunks(table, start, end, session_ids, chunk_size)
+            counts[table] = writer(os.path.join(out_dir, table), self.export_columns(table), chunks)
+        return counts
+
+    # Deletes every session that started before `before`, with its notes and practice results, then
+    # (optionally) runs VACUUM so the file actually shrinks. Rows are deleted chunk_size at a time, so the
+    # database is never locked for long. Returns {table: number of rows deleted}.
+    def compact(self, before, vacuum=True, chunk_size=DEFAULT_CHUNK_SIZE):
+        before = _iso(before)
+        old_sessions = "SELECT id FROM Sessions WHERE timestamp < ?"
+        steps = [
+            ("Notes", f"SELECT id FROM Notes WHERE session_id IN ({old_sessions}) LIMIT ?"),
+            ("PracticeResults", f"SELECT id FROM PracticeResults WHERE session_id IN ({old_sessions}) LIMIT ?"),
+            ("Sessions", f"{old_sessions} LIMIT ?"),
+        ]
+
+        counts = {}
+        for table, select in steps:
+            counts[table] = 0
+            while True:
+                cur = self.conn.execute(f"DELETE FROM {table} WHERE id IN ({select})", (before, chunk_size))
+                self.conn.commit()
+                counts[table] += cur.rowcount
+                if cur.rowcount < chunk_size:
+                    break
+
+        if vacuum:
+            self.conn.execute("VACUUM")
+        return counts
+
+# Writes chunks of rows to <base>.csv, with a header row. Returns the number of rows written.
+def _write_csv(base, columns, chunks):
+    count = 0
+    with open(base + ".csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in columns])
+        for rows in chunks:
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+# Turns one column of a chunk into a NumPy array.
+# REAL -> float64 (NULL = nan), INTEGER -> int64 when every value is an integer, anything else -> str (NULL = "").
+# (SQLite does not enforce column types: Notes.note holds note names like "C4".)
+def _column_array(values, declared):
+    if declared == "REAL":
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    if declared == "INTEGER" and all(isinstance(v, int) for v in values):
+        return np.array(values, dtype=np.int64)
+    return np.array(["" if v is None else str(v) for v in values], dtype=str)
+
+# Writes every chunk to its own <base>-NNNNN.npz file of column arrays. Returns the number of rows written.
+def _write_npz(base, columns, chunks):
+    count = 0
+    for i, rows in enumerate(chunks):
+        arrays = {name: _column_array([r[j] for r in rows], declared) for j, (name, declared) in enumerate(columns)}
+        np.savez(f"{base}-{i:05d}.npz", **arrays)
+        count += len(rows)
+    return count
+
+# Writes chunks to <base>.parquet, one row group per chunk. Returns the number of rows written.
+# The schema comes from the column types (INTEGER -> int64, REAL -> float64, anything else -> string), not from
+# the first chunk, so a column that starts out all NULL still gets its real type.
+def _write_parquet(base, columns, chunks):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow), or use --format npz") from None
+
+    types = {"INTEGER": pa.int64(), "REAL": pa.float64()}
+    schema = pa.schema([(name, types.get(declared, pa.string())) for name, declared in columns])
+
+    # Text columns are written as strings whatever SQLite stored in them.
+    def column_values(values, declared):
+        if declared in types:
+            return values
+        return [None if v is None else str(v) for v in values]
+
+    count = 0
+    with pq.ParquetWriter(base + ".parquet", schema) as writer:
+        for rows in chunks:
+            data = {name: column_values([r[j] for r in rows], declared) for j, (name, declared) in enumerate(columns)}
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+            count += len(rows)
+    return count
+
+# Ensures the function only runs if the file is executed directly (python -m src.db_manager ...).
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or prune the practice database")
+    parser.add_argument("--db", default="assets/database/piano_stats.db", help="database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="stream tables to CSV, .npz chunks or Parquet")
+    export_cmd.add_argument("out_dir")
+    export_cmd.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    export_cmd.add_argument("--tables", nargs="+", choices=list(EXPORT_TABLES), default=["Sessions", "Notes"])
+    export_cmd.add_argument("--since", help="only rows at or after this date/time (ISO, e.g. 2026-01-01)")
+    export_cmd.add_argument("--until", help="only rows before this date/time (ISO)")
+    export_cmd.add_argument("--session", type=int, action="append", help="only this session (repeatable)")
+    export_cmd.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    compact_cmd = commands.add_parser("compact", help="delete sessions older than a date and vacuum")
+    compact_cmd.add_argument("before", help="delete sessions that started before this date/time (ISO)")
+    compact_cmd.add_argument("--no-vacuum", action="store_true", help="skip VACUUM (the file keeps its size)")
+    compact_cmd.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    db = MusicDB(args.db)
+    if args.command == "export":
+        counts = db.export(args.out_dir, args.tables, args.format, args.since, args.until, args.session, args.chunk_size)
+        for table, count in counts.items():
+            print(f"Exported {count} rows from {table}")
+    else:
+        counts = db.compact(args.before, not args.no_vacuum, args.chunk_size)
+        for table, count in counts.items():
+            print(f"Deleted {count} rows from {table}")
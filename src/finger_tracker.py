@@ -0,0 +1,122 @@
+""" This turns fingertip positions into clean note-on / note-off events (one state machine per hand and finger). """
+
+from collections import namedtuple
+import numpy as np
+
+# kind is "on" or "off". finger is (hand, tip_idx). speed is how fast (px/s) the fingertip approached the key
+# (None when it is not known, e.g. on a finger's first frame).
+NoteEvent = namedtuple("NoteEvent", ["kind", "note", "finger", "time", "speed"])
+
+# Per-finger state: the pressed note (or None), when it was pressed, and where the fingertip was last frame.
+class _FingerState:
+    __slots__ = ("note", "pressed_at", "last_pos", "last_time")
+
+    def __init__(self):
+        self.note = None
+        self.pressed_at = 0.0
+        self.last_pos = None
+        self.last_time = None
+
+class FingerTracker:
+
+    # press_radius: a fingertip closer than this to a key target presses it (immediately, no added latency).
+    # release_radius: the key is only released once the fingertip moves further away than this (hysteresis).
+    # min_dwell: a pressed key stays down at least this long (seconds), so jitter cannot retrigger it.
+    # z_press / z_release: optional depth gate on MediaPipe's landmark z (relative to the wrist, larger = further
+    # from the camera). Presses need z >= z_press, and a key is released once z < z_release.
+    def __init__(self, press_radius=15, release_radius=20, min_dwell=0.06, z_press=None, z_release=None):
+        if release_radius < press_radius:
+            raise ValueError("release_radius must be >= press_radius")
+        self.press_radius = press_radius
+        self.release_radius = release_radius
+        self.min_dwell = min_dwell
+        self.z_press = z_press
+        self.z_release = z_press if z_release is None else z_release
+        self.fingers = {}
+
+    # Returns {finger: note} for every key currently held down.
+    def pressed(self):
+        return {finger: st.note for finger, st in self.fingers.items() if st.note is not None}
+
+    # Feeds one frame.
+    # fingers: {(hand, tip_idx): (x, y, z)} for every fingertip seen this frame (pixel x/y, MediaPipe z).
+    # targets: (K, 2) key target positions. names: the K note names. now: frame time in seconds.
+    # Returns the list of NoteEvents (note-offs first, so a moving finger releases before it presses).
+    def update(self, fingers, targets, names, now):
+        offs, ons = [], []
+        index = {name: k for k, name in enumerate(names)}
+        targets = np.asarray(targets, dtype=float).reshape(-1, 2)
+
+        # Distances from every fingertip to every key, in one go: shape (num_fingers, num_keys).
+        ids = list(fingers)
+        if ids and len(targets):
+            points = np.array([fingers[f][:2] for f in ids], dtype=float)
+            dist = np.hypot(points[:, None, 0] - targets[None, :, 0], points[:, None, 1] - targets[None, :, 1])
+        else:
+            dist = np.zeros((len(ids), 0))
+
+        for row, finger in enumerate(ids):
+            st = self.fingers.get(finger)
+            if st is None:
+                st = self.fingers[finger] = _FingerState()
+            x, y, z = fingers[finger]
+            d = dist[row]
+
+            # Releases the held key once the fingertip has clearly left it (or lifted), but never before min_dwell.
+            if st.note is not None:
+                k = index.get(st.note)
+                left = k is None or d[k] > self.release_radius
+                lifted = self.z_release is not None and z < self.z_release
+                if (left or lifted) and now - st.pressed_at >= self.min_dwell:
+                    offs.append(NoteEvent("off", st.note, finger, now, 0.0))
+                    st.note = None
+
+            # Presses the nearest key as soon as the fingertip is inside press_radius.
+            if st.note is None and len(d):
+                k = int(np.argmin(d))
+                depth_ok = self.z_press is None or z >= self.z_press
+                if d[k] < self.press_radius and depth_ok:
+                    ons.append(NoteEvent("on", names[k], finger, now, self._approach_speed(st, targets[k], x, y, now)))
+                    st.note = names[k]
+                    st.pressed_at = now
+
+            st.last_pos = (x, y)
+            st.last_time = now
+
+        # Fingers that disappeared (hand lost) release their keys once min_dwell has passed.
+        for finger, st in list(self.fingers.items()):
+            if finger in fingers:
+                continue
+            if st.note is not None and now - st.pressed_at >= self.min_dwell:
+                offs.append(NoteEvent("off", st.note, finger, now, 0.0))
+                st.note = None
+            if st.note is None:
+                del self.fingers[finger]
+
+        return offs + ons
+
+    # How fast the fingertip closed in on the key since the previous frame (px/s, None if unknown).
+    # A finger that did not move closer (e.g. one resting on the key) gives 0.
+    @staticmethod
+    def _approach_speed(st, target, x, y, now):
+        if st.last_pos is None or st.last_time is None or now <= st.last_time:
+            return None
+        before = np.hypot(st.last_pos[0] - target[0], st.last_pos[1] - target[1])
+        after = np.hypot(x - target[0], y - target[1])
+        return max(0.0, float(before - after) / (now - st.last_time))
+
+    # Releases every held key (e.g. when the sheet is lost or the app stops).
+    def release_all(self, now):
+        events = [NoteEvent("off", st.note, finger, now, 0.0) for finger, st in self.fingers.items() if st.note]
+        self.fingers.clear()
+        return events
+
+# Gives every fingertip in a frame a stable (hand, tip_idx) ID.
+# MediaPipe's handedness label is used when it is known and unique, otherwise the hand's position in the list.
+def fingertip_ids(handedness, tip_ids):
+    labels = [int(h) for h in handedness]
+    ids = []
+    for i, label in enumerate(labels):
+        hand = label if label >= 0 and labels.count(label) == 1 else f"hand{i}"
+        ids.append([(hand, tip) for tip in tip_ids])
+    return ids
@@ -0,0 +1,73 @@
+""" This keeps the per-frame image buffers alive between frames so the CV loop does not allocate new full-size images. """
+
+import base64
+import numpy as np
+import cv2
+
+# Owns every large array the CV loop writes into.
+class FrameBufferPool:
+
+    # Sets the preview size (width, height) and starts with an empty pool.
+    # detect_size: size (width, height) of the RGB image for MediaPipe, when it should differ from the preview.
+    def __init__(self, display_size=(854, 480), detect_size=None):
+        self.display_size = tuple(display_size)
+        self.detect_size = None if detect_size is None else tuple(detect_size)
+        self._buffers = {}
+
+        # Counts how many times a buffer had to be (re)allocated. Stays flat once the loop is warm.
+        self.allocations = 0
+
+    # Returns the named buffer. Only allocates when it does not exist yet or the requested shape changed.
+    def get(self, name, shape, dtype=np.uint8):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buf
+            self.allocations += 1
+        return buf
+
+    # Shape (height, width, 3) of the RGB image prepare() produces.
+    @property
+    def rgb_shape(self):
+        w, h = self.detect_size or self.display_size
+        return (h, w, 3)
+
+    # Turns a raw camera frame into the mirrored preview (BGR) and its RGB copy for MediaPipe.
+    # Both returned arrays belong to the pool and are overwritten by the next call.
+    # rgb: optional array to write the RGB copy into instead (e.g. a shared-memory slot of ProcessHandDetector).
+    def prepare(self, raw_frame, rgb=None):
+        dw, dh = self.display_size
+        small = self.get("small", (dh, dw, 3))
+        display = self.get("display", (dh, dw, 3))
+        if rgb is None:
+            rgb = self.get("rgb", self.rgb_shape)
+
+        # Resizes first so the flip only touches the small image (the two operations commute).
+        cv2.resize(raw_frame, (dw, dh), dst=small)
+
+        # Flips the image so it acts like a mirror (intuitive for users).
+        cv2.flip(small, 1, dst=display)
+
+        # A detection size of its own is scaled from the raw frame, not from the preview, so detecting above
+        # the preview size really sees more detail. The flip again only touches the smaller image.
+        source = display
+        if self.detect_size not in (None, self.display_size):
+            detect_w, detect_h = self.detect_size
+            detect_small = self.get("detect_small", self.rgb_shape)
+            source = self.get("detect", self.rgb_shape)
+            # INTER_AREA is only good at shrinking. A camera that ignored the requested resolution may need enlarging.
+            shrink = detect_w <= raw_frame.shape[1] and detect_h <= raw_frame.shape[0]
+            cv2.resize(raw_frame, (detect_w, detect_h), dst=detect_small, interpolation=cv2.INTER_AREA if shrink else cv2.INTER_LINEAR)
+            cv2.flip(detect_small, 1, dst=source)
+
+        # Converts to RGB for MediaPipe.
+        cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=rgb)
+        return display, rgb
+
+# Encodes a frame into a JPEG and returns it as a Base64 string.
+# The JPEG and its text are only a few dozen KB, so unlike the frames they are not pooled.
+def encode_jpeg_base64(frame):
+    ok, buf = cv2.imencode(".jpg", frame)
+    if not ok:
+        return None
+    return base64.b64encode(buf).decode("ascii")
@@ -1,112 +1,224 @@
-""" This script creates the physical PNG images of printable piano sheets. """
+""" This script creates the printable piano sheets, as PNG images or as vector SVG/PDF files. """
 
 import os
+import sys
 import shutil
+import argparse
 import numpy as np
 import cv2
 
-def generate_seamless_piano():
-
-    # Sets A4 resolution (3508x2480). Sets top margin.
-    page_width, page_height = 3508, 2480
-    keys_top_y = int(page_height * 0.25)
-    output_dir = "piano_pages"
-
-    # Deletes piano_pages folder if it exists, then recreates it (clean slate).
+# Add the parent directory to Python system's path so we can import 'src'.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The page geometry is shared with PianoMapper so the printed keys and the hit zones always agree.
+from src.piano_logic import (
+    PAGE_WIDTH,
+    PAGE_HEIGHT,
+    KEYS_TOP_RATIO,
+    WHITE_KEYS_PER_PAGE,
+    BLACK_KEY_WIDTH,
+    BLACK_KEY_HEIGHT,
+    MARKER_MARGIN,
+    MARKER_SIZE,
+    WHITE_KEYS,
+    KEY_IS_BLACK,
+)
+
+OUTPUT_FORMATS = ("png", "svg", "pdf")
+
+# Colors (RGB) and the key outline width, in page pixels.
+WHITE_KEY_FILL = (245, 250, 250)
+OUTLINE_WIDTH = 3
+
+# The pixel pages are A4 landscape at 300 DPI. PDF uses points (1/72 inch).
+PDF_SCALE = 72 / 300
+
+# Works out where everything goes on one page (page_index 0-5), in page pixels.
+# Returns white keys [(x1, x2)], black key centers [x], the keys' top edge, the black keys' bottom edge,
+# and the markers [(marker_id, x, y)] (top-left corners).
+def page_layout(page_index):
+    num_keys = WHITE_KEYS_PER_PAGE[page_index]
+    wk_start_index = sum(WHITE_KEYS_PER_PAGE[:page_index])
+    keys_top_y = int(PAGE_HEIGHT * KEYS_TOP_RATIO)
+    wk_width = PAGE_WIDTH / num_keys
+
+    # Finds which white keys (by white-key index) have a black key to their right.
+    has_black_to_right = {
+        w for w, key in enumerate(WHITE_KEYS) if key + 1 < len(KEY_IS_BLACK) and KEY_IS_BLACK[key + 1]
+    }
+
+    white = [(i * wk_width, (i + 1) * wk_width) for i in range(num_keys)]
+
+    # Black keys sit centered on the lines between white keys.
+    # Includes the "Left Edge Seam" (half black key on the left edge, continued from the previous page).
+    black = [0.0] if (wk_start_index - 1) in has_black_to_right else []
+    black += [(i + 1) * wk_width for i in range(num_keys) if wk_start_index + i in has_black_to_right]
+
+    # Markers 2n and 2n+1, in the top-left and top-right corners.
+    marker_id = 2 * page_index
+    markers = [
+        (marker_id, MARKER_MARGIN, MARKER_MARGIN),
+        (marker_id + 1, PAGE_WIDTH - MARKER_MARGIN - MARKER_SIZE, MARKER_MARGIN),
+    ]
+
+    return {
+        "white": white,
+        "black": black,
+        "black_width": wk_width * BLACK_KEY_WIDTH,
+        "keys_top": keys_top_y,
+        "black_bottom": keys_top_y + (PAGE_HEIGHT - keys_top_y) * BLACK_KEY_HEIGHT,
+        "markers": markers,
+    }
+
+# Returns the black cells of an ArUco marker as (column, row, run length) in cell units (the marker is
+# 6x6 cells: a 4x4 bit grid plus a one-cell black border). Neighbouring black cells in a row are merged.
+def marker_cells(aruco_dict, marker_id):
+    size = aruco_dict.markerSize + 2
+    grid = cv2.aruco.generateImageMarker(aruco_dict, marker_id, size)
+    cells = []
+    for row in range(size):
+        col = 0
+        while col < size:
+            if grid[row, col] == 0:
+                start = col
+                while col < size and grid[row, col] == 0:
+                    col += 1
+                cells.append((start, row, col - start))
+            else:
+                col += 1
+    return cells
+
+# Rasterizes one page into a 3508x2480 BGR image.
+def render_png(layout, aruco_dict):
+
+    # Creates a white image.
+    img = np.ones((PAGE_HEIGHT, PAGE_WIDTH, 3), dtype=np.uint8) * 255
+    top = layout["keys_top"]
+    fill = WHITE_KEY_FILL[::-1]
+
+    # Draws rectangles and outlines for white keys.
+    for x1, x2 in layout["white"]:
+        cv2.rectangle(img, (int(x1), top), (int(x2), PAGE_HEIGHT), fill, -1)
+        cv2.rectangle(img, (int(x1), top), (int(x2), PAGE_HEIGHT), (0, 0, 0), OUTLINE_WIDTH)
+
+    # Draws the black keys.
+    half = layout["black_width"] / 2
+    for center in layout["black"]:
+        center = int(center)
+        cv2.rectangle(img, (int(center - half), top), (int(center + half), int(layout["black_bottom"])), (0, 0, 0), -1)
+
+    # Pastes the ArUco markers.
+    for marker_id, x, y in layout["markers"]:
+        marker = cv2.aruco.generateImageMarker(aruco_dict, marker_id, MARKER_SIZE)
+        img[y : y + MARKER_SIZE, x : x + MARKER_SIZE] = cv2.cvtColor(marker, cv2.COLOR_GRAY2BGR)
+    return img
+
+# Formats a number for SVG/PDF output (no trailing zeros, so the files stay small).
+def _num(value):
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+# Lists every rectangle on a page as (x, y, width, height, fill RGB or None, outlined), in paint order.
+def _page_rects(layout, aruco_dict):
+    top = layout["keys_top"]
+    rects = [(x1, top, x2 - x1, PAGE_HEIGHT - top, WHITE_KEY_FILL, True) for x1, x2 in layout["white"]]
+
+    width = layout["black_width"]
+    rects += [(c - width / 2, top, width, layout["black_bottom"] - top, (0, 0, 0), False) for c in layout["black"]]
+
+    # Markers are drawn cell by cell.
+    for marker_id, x, y in layout["markers"]:
+        cell = MARKER_SIZE / (aruco_dict.markerSize + 2)
+        for col, row, run in marker_cells(aruco_dict, marker_id):
+            rects.append((x + col * cell, y + row * cell, run * cell, cell, (0, 0, 0), False))
+    return rects
+
+# Writes one page as SVG (A4 landscape, in page-pixel coordinates).
+def render_svg(layout, aruco_dict):
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="297mm" height="210mm" viewBox="0 0 {PAGE_WIDTH} {PAGE_HEIGHT}">',
+        f'<rect width="{PAGE_WIDTH}" height="{PAGE_HEIGHT}" fill="#fff"/>',
+    ]
+    for x, y, w, h, fill, outlined in _page_rects(layout, aruco_dict):
+        color = "#{:02x}{:02x}{:02x}".format(*fill)
+        stroke = f' stroke="#000" stroke-width="{OUTLINE_WIDTH}"' if outlined else ""
+        lines.append(f'<rect x="{_num(x)}" y="{_num(y)}" width="{_num(w)}" height="{_num(h)}" fill="{color}"{stroke}/>')
+    lines.append("</svg>")
+    return "\n".join(lines) + "\n"
+
+# Builds the PDF drawing commands for one page. The transform maps page pixels (y down) to points (y up).
+def _pdf_content(layout, aruco_dict):
+    ops = [f"{_num(PDF_SCALE)} 0 0 {_num(-PDF_SCALE)} 0 {_num(PAGE_HEIGHT * PDF_SCALE)} cm", f"{OUTLINE_WIDTH} w"]
+    for x, y, w, h, fill, outlined in _page_rects(layout, aruco_dict):
+        rgb = " ".join(_num(c / 255) for c in fill)
+        ops.append(f"{rgb} rg {_num(x)} {_num(y)} {_num(w)} {_num(h)} re {'B' if outlined else 'f'}")
+    return "\n".join(ops).encode("ascii")
+
+# Writes a multi-page PDF (one A4 landscape page per layout). No PDF library is needed for rectangles.
+def render_pdf(layouts, aruco_dict):
+    num_pages = len(layouts)
+    width, height = _num(PAGE_WIDTH * PDF_SCALE), _num(PAGE_HEIGHT * PDF_SCALE)
+
+    # Objects: 1 = catalog, 2 = page tree, then a (page, content stream) pair per page.
+    page_ids = [3 + 2 * i for i in range(num_pages)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] /Count {num_pages} >>".encode("ascii"),
+    ]
+    for page_id, layout in zip(page_ids, layouts):
+        content = _pdf_content(layout, aruco_dict)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] /Contents {page_id + 1} 0 R >>".encode("ascii")
+        )
+        objects.append(f"<< /Length {len(content)} >>\nstream\n".encode("ascii") + content + b"\nendstream")
+
+    # Writes the objects and the cross-reference table (byte offset of every object).
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("ascii")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii")
+    return bytes(out)
+
+# formats: any of OUTPUT_FORMATS. PNG and SVG are written per page (Page_N.png / Page_N.svg),
+# PDF as a single printable file with every page (piano_pages.pdf).
+def generate_seamless_piano(output_dir="piano_pages", formats=("png",)):
+    unknown = set(formats) - set(OUTPUT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown output format(s): {', '.join(sorted(unknown))}")
+
+    # Deletes the output folder if it exists, then recreates it (clean slate).
     if os.path.exists(output_dir):
         shutil.rmtree(output_dir)
     os.makedirs(output_dir)
 
-    # It mathematically calculates which keys have a black key to their right.
-    has_black_to_right = set()
-    has_black_to_right.add(0)
-
-    # Uses octave_pattern to populate has_black_to_right set for the whole piano.
-    # Octave Pattern: C-Yes, D-Yes, E-No, F-Yes, G-Yes, A-Yes, B-No
-    octave_pattern = [True, True, False, True, True, True, False]
-
-    current_wk = 2  # Starts at C1.
-
-    for _ in range(7):
-        for has_black in octave_pattern:
-            if has_black:
-                has_black_to_right.add(current_wk)
-            current_wk += 1
-
-    # Defines how many white keys fit on each page.
-    wk_per_page = [9, 9, 9, 9, 9, 7]
-
     aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
-    marker_id = 0
-    wk_start_index = 0
+    layouts = [page_layout(i) for i in range(len(WHITE_KEYS_PER_PAGE))]
     print("Generating 88-Key Seamless Piano...")
 
-    for page_num, num_keys in enumerate(wk_per_page, 1):
-
-        # Creates a white image.
-        img = np.ones((page_height, page_width, 3), dtype=np.uint8) * 255
-        wk_width = page_width / num_keys
-        bk_width = wk_width * 0.55
-        bk_height = (page_height - keys_top_y) * 0.65
-
-        # Draws rectangles and outlines for white keys based on wk_width.
-        for i in range(num_keys):
-            x1 = int(i * wk_width)
-            x2 = int((i + 1) * wk_width)
-
-            # Fill Off-White
-            cv2.rectangle(img, (x1, keys_top_y), (x2, page_height), (250, 250, 245), -1)
-
-            # Outline
-            cv2.rectangle(img, (x1, keys_top_y), (x2, page_height), (0, 0, 0), 3)
-
-        # Checks has_black_to_right. Draws black rectangles centered on the lines between white keys.
-        # Includes logic for "Left Edge Seam" (half black key on the left edge).
-        if (wk_start_index - 1) in has_black_to_right:
-            bk_x1 = int(0 - (bk_width / 2))
-            bk_x2 = int(0 + (bk_width / 2))
-            cv2.rectangle(
-                img,
-                (bk_x1, keys_top_y),
-                (bk_x2, int(keys_top_y + bk_height)),
-                (0, 0, 0),
-                -1,
-            )
-
-        # Standard Black Keys
-        for i in range(num_keys):
-            global_idx = wk_start_index + i
-            if global_idx in has_black_to_right:
-                center_x = int((i + 1) * wk_width)
-                bk_x1 = int(center_x - (bk_width / 2))
-                bk_x2 = int(center_x + (bk_width / 2))
-                cv2.rectangle(
-                    img,
-                    (bk_x1, keys_top_y),
-                    (bk_x2, int(keys_top_y + bk_height)),
-                    (0, 0, 0),
-                    -1,
-                )
-
-        # Generates two ArUco markers (marker_id and marker_id+1).
-        # Places markers in the top-left and top-right corners.
-        marker_img_l = cv2.aruco.generateImageMarker(aruco_dict, marker_id, 300)
-        marker_img_l = cv2.cvtColor(marker_img_l, cv2.COLOR_GRAY2BGR)
-        img[150:450, 150:450] = marker_img_l
-        marker_img_r = cv2.aruco.generateImageMarker(aruco_dict, marker_id + 1, 300)
-        marker_img_r = cv2.cvtColor(marker_img_r, cv2.COLOR_GRAY2BGR)
-        img[150:450, page_width - 450 : page_width - 150] = marker_img_r
-
-        # Saves the PNG.
-        filename = os.path.join(output_dir, f"Page_{page_num}.png")
-        cv2.imwrite(filename, img)
-        print(f"Generated Page {page_num} (Markers {marker_id}, {marker_id+1})")
-
-        # Increments marker_id by 2 for the next page.
-        marker_id += 2
-        wk_start_index += num_keys
+    for page_num, layout in enumerate(layouts, 1):
+        if "png" in formats:
+            cv2.imwrite(os.path.join(output_dir, f"Page_{page_num}.png"), render_png(layout, aruco_dict))
+        if "svg" in formats:
+            with open(os.path.join(output_dir, f"Page_{page_num}.svg"), "w") as f:
+                f.write(render_svg(layout, aruco_dict))
+        marker_ids = [m[0] for m in layout["markers"]]
+        print(f"Generated Page {page_num} (Markers {marker_ids[0]}, {marker_ids[1]})")
+
+    if "pdf" in formats:
+        with open(os.path.join(output_dir, "piano_pages.pdf"), "wb") as f:
+            f.write(render_pdf(layouts, aruco_dict))
+        print("Generated piano_pages.pdf")
 
 # Ensures the function only runs if the file is executed directly.
 if __name__ == "__main__":
-    # Generates 6 PNG files representing the 88-key piano.
-    generate_seamless_piano()
+    parser = argparse.ArgumentParser(description="Generate the printable piano sheets")
+    parser.add_argument("--format", nargs="+", choices=OUTPUT_FORMATS, default=["png"], help="output format(s) (default: png)")
+    parser.add_argument("--out", default="piano_pages", help="output folder (default: %(default)s)")
+    args = parser.parse_args()
+
+    # Generates the 6 pages representing the 88-key piano.
+    generate_seamless_piano(args.out, args.format)
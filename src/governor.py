@@ -0,0 +1,79 @@
+""" This adjusts capture resolution, detection resolution and the hand model to keep each frame inside the frame-rate budget. """
+
+import time
+from collections import deque
+
+# Quality levels from cheapest to most accurate.
+# capture: camera resolution. detect: size of the image MediaPipe sees, scaled from the camera frame (the preview
+# stays 854x480).
+# Level 2 is what the app always used before (1280x720 camera, 854x480 detection, the light model).
+QUALITY_LEVELS = (
+    {"capture": (640, 360), "detect": (480, 270), "model_complexity": 0, "max_num_hands": 1},
+    {"capture": (960, 540), "detect": (640, 360), "model_complexity": 0, "max_num_hands": 2},
+    {"capture": (1280, 720), "detect": (854, 480), "model_complexity": 0, "max_num_hands": 2},
+    {"capture": (1280, 720), "detect": (854, 480), "model_complexity": 1, "max_num_hands": 2},
+    {"capture": (1920, 1080), "detect": (1280, 720), "model_complexity": 1, "max_num_hands": 2},
+)
+DEFAULT_LEVEL = 2
+
+# Watches how long each frame takes to process and steps the quality level up or down.
+class FrameGovernor:
+
+    # target_fps: frame rate to keep up with (the budget per frame is 1 / target_fps).
+    # headroom: only steps up while frames take less than this fraction of the budget. The gap between this and
+    # the budget is the hysteresis band where nothing changes.
+    # window: frames averaged before deciding. cooldown: seconds to wait after a change before the next one.
+    def __init__(self, target_fps=30, levels=QUALITY_LEVELS, start_level=DEFAULT_LEVEL, headroom=0.6, window=45, cooldown=3.0):
+        self.levels = levels
+        self.level = start_level
+        self.budget = 1.0 / target_fps
+        self.headroom = headroom
+        self.window = window
+        self.cooldown = cooldown
+        self.costs = deque(maxlen=window)
+        self._last_change = None
+
+        # A level that had to be left for being too slow is only retried after up_backoff seconds. The wait doubles
+        # every time the retry fails, so the governor does not keep flipping between two levels.
+        self.up_backoff = 30.0
+        self._blocked_until = {}
+        self._last_step_up = None
+
+    # Settings of the current level.
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    # Feeds the processing time of one frame (seconds). Returns the new settings when the level changed, else None.
+    def update(self, frame_cost, now=None):
+        now = time.perf_counter() if now is None else now
+        if self._last_change is None:
+            self._last_change = now
+        self.costs.append(frame_cost)
+
+        # Decides only on a full window of frames measured at the current level, after the cooldown.
+        if len(self.costs) < self.window or now - self._last_change < self.cooldown:
+            return None
+        cost = sum(self.costs) / len(self.costs)
+
+        if cost > self.budget and self.level > 0:
+            # A step up that turned out too slow soon after blocks that level for a while (longer each time).
+            if self._last_step_up is not None:
+                failed_level, backoff, stepped_at = self._last_step_up
+                if now - stepped_at < self.up_backoff:
+                    self._blocked_until[failed_level] = (now + backoff, backoff * 2)
+                self._last_step_up = None
+            return self._change(self.level - 1, now)
+
+        if cost < self.budget * self.headroom and self.level < len(self.levels) - 1:
+            until, backoff = self._blocked_until.get(self.level + 1, (0.0, self.up_backoff))
+            if now >= until:
+                self._last_step_up = (self.level + 1, backoff, now)
+                return self._change(self.level + 1, now)
+        return None
+
+    def _change(self, level, now):
+        self.level = level
+        self._last_change = now
+        self.costs.clear()
+        return self.settings
@@ -0,0 +1,108 @@
+""" This converts MediaPipe hand results into plain NumPy arrays that the rest of the app can store, cache, and replay. """
+
+import numpy as np
+import cv2
+
+# MediaPipe returns 21 landmarks per hand (x, y, z).
+NUM_LANDMARKS = 21
+
+# The app never asks MediaPipe for more than 2 hands.
+MAX_HANDS = 2
+
+# Landmark IDs of the 4 fingertips (8=Index, 12=Middle, 16=Ring, 20=Pinky).
+FINGERTIP_IDS = (8, 12, 16, 20)
+
+# Stores MediaPipe's "Left"/"Right" labels as small integers (-1 = unknown).
+HANDEDNESS_CODES = {"Left": 0, "Right": 1}
+HANDEDNESS_LABELS = {0: "Left", 1: "Right"}
+
+# Returns an empty result (no hands found).
+def empty_hands():
+    return np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32), np.zeros(0, dtype=np.int8)
+
+# Converts a MediaPipe Hands result into (landmarks, handedness).
+# landmarks has shape (num_hands, 21, 3) in normalized image coordinates, handedness has shape (num_hands,).
+def results_to_arrays(res):
+    if res is None or not res.multi_hand_landmarks:
+        return empty_hands()
+
+    hands = res.multi_hand_landmarks[:MAX_HANDS]
+    landmarks = np.empty((len(hands), NUM_LANDMARKS, 3), dtype=np.float32)
+    handedness = np.full(len(hands), -1, dtype=np.int8)
+
+    for h, hand_lm in enumerate(hands):
+        for i, lm in enumerate(hand_lm.landmark):
+            landmarks[h, i] = (lm.x, lm.y, lm.z)
+
+    # multi_handedness is listed in the same order as multi_hand_landmarks.
+    if getattr(res, "multi_handedness", None):
+        for h, hand_cls in enumerate(res.multi_handedness[: len(hands)]):
+            label = hand_cls.classification[0].label
+            handedness[h] = HANDEDNESS_CODES.get(label, -1)
+
+    return landmarks, handedness
+
+# The 21 bones MediaPipe draws between hand landmarks (same pairs as mp.solutions.hands.HAND_CONNECTIONS).
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+)
+
+# Draws a hand skeleton (green bones, red joints) like mp.solutions.drawing_utils.draw_landmarks.
+def draw_hand(frame, hand_landmarks):
+    h, w = frame.shape[:2]
+    points = [(int(x * w), int(y * h)) for x, y, _ in hand_landmarks]
+    for a, b in HAND_CONNECTIONS:
+        cv2.line(frame, points[a], points[b], (0, 255, 0), 2)
+    for p in points:
+        cv2.circle(frame, p, 2, (0, 0, 255), 2)
+
+# Builds MediaPipe Hands with the given settings. MediaPipe is imported here, so this module loads without it,
+# and functools.partial(mediapipe_hands, config) can be sent to a worker process.
+def mediapipe_hands(config):
+    import mediapipe as mp
+
+    return mp.solutions.hands.Hands(**config)
+
+# Runs MediaPipe Hands on RGB frames and returns (landmarks, handedness) arrays.
+# hands_factory builds the MediaPipe Hands object. It is only called on the first cache miss,
+# so a fully cached replay never loads the model at all.
+class HandDetector:
+
+    # config holds the Hands settings (model_complexity, confidences, max_num_hands). It is part of the cache key.
+    def __init__(self, hands_factory, config, cache=None):
+        self.hands_factory = hands_factory
+        self.config = dict(config)
+        self.cache = cache
+        self._hands = None
+        self.hits = 0
+        self.misses = 0
+
+    def process(self, rgb):
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(rgb, self.config)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+        self.misses += 1
+        if self._hands is None:
+            self._hands = self.hands_factory()
+        result = results_to_arrays(self._hands.process(rgb))
+
+        if key is not None:
+            self.cache.put(key, *result)
+        return result
+
+    # Frees the model, writes any pending cache entries to disk and closes the cache.
+    def close(self):
+        if self._hands is not None and hasattr(self._hands, "close"):
+            self._hands.close()
+        self._hands = None
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,194 @@
+""" This runs hand inference in a separate worker process: frames go in through a shared-memory ring buffer and the landmarks come back over a pipe. """
+
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+from collections import deque
+import numpy as np
+
+from src.hands import results_to_arrays
+
+# Frames that can be waiting for (or inside) the worker at once.
+DEFAULT_SLOTS = 3
+
+# The worker process. It maps the ring, builds the hand model, then answers one message per frame.
+# Messages in: ("attach", shm_name, ring_shape), ("frame", seq, slot), or None to stop.
+# Messages out: (seq, landmarks, handedness, cpu_seconds) where cpu_seconds is what the inference cost this process.
+def _worker_main(conn, hands_factory):
+    shm, ring, hands = None, None, None
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            if msg[0] == "attach":
+                _, name, shape = msg
+                shm = shared_memory.SharedMemory(name=name)
+                ring = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+                continue
+
+            _, seq, slot = msg
+            if hands is None:
+                hands = hands_factory()
+            cpu_start = time.process_time()
+            # MediaPipe reads the frame straight out of shared memory (no copy).
+            landmarks, handedness = results_to_arrays(hands.process(ring[slot]))
+            conn.send((seq, landmarks, handedness, time.process_time() - cpu_start))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        if hands is not None and hasattr(hands, "close"):
+            hands.close()
+        # The array view has to go before the shared memory can be closed.
+        ring = None
+        if shm is not None:
+            shm.close()
+
+# Drop-in replacement for src.hands.HandDetector that runs the model in a worker process.
+# Each detector owns one worker and one ring, so a multi-camera setup uses one detector per camera.
+# hands_factory must be picklable (a module-level function or a functools.partial), since it is sent to the worker.
+class ProcessHandDetector:
+
+    def __init__(self, hands_factory, config, cache=None, slots=DEFAULT_SLOTS):
+        self.hands_factory = hands_factory
+        self.config = dict(config)
+        self.cache = cache
+        self.slots = slots
+        self.hits = 0
+        self.misses = 0
+
+        # Round-trip times (submit to result, seconds) of recent frames, and the CPU time the worker spent on them.
+        self.round_trips = deque(maxlen=1000)
+        self.worker_cpu = 0.0
+        self.frames = 0
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._shm = None
+        self._ring = None
+        self._next_seq = 0
+        self._next_slot = 0
+        # Frames sent to the worker, oldest first: (seq, submit time, cache key).
+        self._in_flight = deque()
+        # Results that are ready but not collected yet: {seq: (landmarks, handedness)}.
+        self._results = {}
+
+    # Creates the ring (slots x frame shape) and starts the worker. Called on the first frame.
+    def _start(self, shape):
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slots * int(np.prod(shape)))
+        self._ring = np.ndarray((self.slots,) + shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._conn, child_conn = self._ctx.Pipe()
+        self._process = self._ctx.Process(target=_worker_main, args=(child_conn, self.hands_factory), daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._conn.send(("attach", self._shm.name, self._ring.shape))
+
+    # Returns the ring slot the next frame will be sent from. Writing the RGB frame straight into it
+    # (e.g. cv2.cvtColor(..., dst=slot)) makes the handoff zero-copy. Waits if every slot is still in use.
+    def frame_buffer(self, shape):
+        shape = tuple(shape)
+        if self._ring is None:
+            self._start(shape)
+        elif self._ring.shape[1:] != shape:
+            raise ValueError(f"Frame shape {shape} does not match the ring's {self._ring.shape[1:]}")
+        while len(self._in_flight) >= self.slots:
+            self._receive_one()
+        return self._ring[self._next_slot % self.slots]
+
+    # Hands a frame to the worker and returns a ticket for collect(). Does not wait for the result.
+    def submit(self, rgb):
+        seq = self._next_seq
+        self._next_seq += 1
+
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(rgb, self.config)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                self._results[seq] = cached
+                return seq
+
+        self.misses += 1
+        slot = self.frame_buffer(rgb.shape)
+        if not np.may_share_memory(rgb, slot):
+            slot[...] = rgb
+        self._in_flight.append((seq, time.perf_counter(), key))
+        self._conn.send(("frame", seq, self._next_slot % self.slots))
+        self._next_slot += 1
+        return seq
+
+    # Reads the oldest pending result from the worker.
+    def _receive_one(self):
+        try:
+            seq, landmarks, handedness, cpu = self._conn.recv()
+        except (EOFError, OSError) as e:
+            raise RuntimeError("The hand inference worker stopped") from e
+        _, submitted, key = self._in_flight.popleft()
+        self.round_trips.append(time.perf_counter() - submitted)
+        self.worker_cpu += cpu
+        self.frames += 1
+        if key is not None:
+            self.cache.put(key, landmarks, handedness)
+        self._results[seq] = (landmarks, handedness)
+
+    # Waits for and returns the (landmarks, handedness) of a submitted frame.
+    def collect(self, ticket):
+        while ticket not in self._results:
+            self._receive_one()
+        return self._results.pop(ticket)
+
+    # Same call as HandDetector.process (submits and waits).
+    def process(self, rgb):
+        return self.collect(self.submit(rgb))
+
+    # Round-trip latency and how much inference CPU time was moved out of this process.
+    def stats(self):
+        times = np.array(self.round_trips) * 1000
+        return {
+            "frames": self.frames,
+            "cache_hits": self.hits,
+            "round_trip_ms_p50": float(np.percentile(times, 50)) if len(times) else None,
+            "round_trip_ms_p95": float(np.percentile(times, 95)) if len(times) else None,
+            "worker_cpu_s": self.worker_cpu,
+        }
+
+    # Carries on the counters of a detector this one replaces (e.g. after a quality change), so stats()
+    # covers the whole session and not only the last worker.
+    def continue_stats(self, previous):
+        self.round_trips.extend(previous.round_trips)
+        self.worker_cpu += previous.worker_cpu
+        self.frames += previous.frames
+        self.hits += previous.hits
+        self.misses += previous.misses
+
+    # Stops the worker, frees the shared memory, writes any pending cache entries to disk and closes the cache.
+    # The ring is unlinked even when stopping the worker fails, so no shared memory outlives the app.
+    def close(self):
+        try:
+            if self._process is not None:
+                try:
+                    self._conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                self._process.join(timeout=5)
+                if self._process.is_alive():
+                    self._process.terminate()
+                self._conn.close()
+                self._process = None
+        finally:
+            if self._shm is not None:
+                self._ring = None
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
+            self._in_flight.clear()
+            if self.cache is not None:
+                self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,126 @@
+""" This stores MediaPipe hand-landmark results on disk so replaying the same recording does not re-run inference. """
+
+import os
+import json
+import hashlib
+import sqlite3
+import numpy as np
+
+from src.hands import NUM_LANDMARKS
+
+# Size-bounded, persistent cache of hand landmarks keyed by (frame content, Hands configuration).
+# Least-recently-used entries are evicted once max_entries is exceeded.
+class LandmarkCache:
+
+    # flush_every: how many writes to batch into one SQLite commit.
+    def __init__(self, db_path="assets/cache/landmarks.db", max_entries=200_000, flush_every=256):
+
+        # Ensures the cache directory exists.
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS Landmarks (
+                key BLOB PRIMARY KEY,
+                num_hands INTEGER,
+                landmarks BLOB,
+                handedness BLOB,
+                last_used INTEGER
+            )
+        """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_landmarks_last_used ON Landmarks (last_used)")
+        self.conn.commit()
+
+        # A logical clock for LRU ordering. Continues from where the previous run stopped.
+        row = self.conn.execute("SELECT MAX(last_used) FROM Landmarks").fetchone()
+        self._clock = row[0] or 0
+        self._pending = 0
+
+        # Number of cached frames, counted once here and then kept up to date, so flushing needs no COUNT(*).
+        self._count = self.conn.execute("SELECT COUNT(*) FROM Landmarks").fetchone()[0]
+
+    # Hashes the frame pixels together with the Hands configuration.
+    # Changing model_complexity, confidences or max_num_hands therefore never returns stale results.
+    @staticmethod
+    def make_key(frame, config):
+        h = hashlib.blake2b(digest_size=20)
+        h.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+        h.update(repr(frame.shape).encode("ascii"))
+        h.update(memoryview(np.ascontiguousarray(frame)).cast("B"))
+        return h.digest()
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    # Returns (landmarks, handedness) for a key, or None on a miss.
+    def get(self, key):
+        row = self.conn.execute(
+            "SELECT num_hands, landmarks, handedness FROM Landmarks WHERE key=?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        # Marks the entry as recently used (committed with the next batch).
+        self.conn.execute("UPDATE Landmarks SET last_used=? WHERE key=?", (self._tick(), key))
+        self._count_write()
+
+        num_hands, lm_blob, hd_blob = row
+        landmarks = np.frombuffer(lm_blob, dtype=np.float32).reshape(num_hands, NUM_LANDMARKS, 3).copy()
+        handedness = np.frombuffer(hd_blob, dtype=np.int8).copy()
+        return landmarks, handedness
+
+    # Stores the landmarks for a key.
+    def put(self, key, landmarks, handedness):
+        values = (
+            len(landmarks),
+            np.ascontiguousarray(landmarks, dtype=np.float32).tobytes(),
+            np.ascontiguousarray(handedness, dtype=np.int8).tobytes(),
+            self._tick(),
+        )
+        # Inserts a new entry, or updates the existing one (only a new entry adds to the count).
+        cur = self.conn.execute(
+            "INSERT OR IGNORE INTO Landmarks (key, num_hands, landmarks, handedness, last_used) VALUES (?, ?, ?, ?, ?)",
+            (key, *values),
+        )
+        if cur.rowcount:
+            self._count += 1
+        else:
+            self.conn.execute(
+                "UPDATE Landmarks SET num_hands=?, landmarks=?, handedness=?, last_used=? WHERE key=?", (*values, key)
+            )
+        self._count_write()
+
+    def _count_write(self):
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    # Number of cached frames.
+    def __len__(self):
+        return self._count
+
+    # Drops the least-recently-used entries beyond max_entries, then commits.
+    def flush(self):
+        excess = self._count - self.max_entries
+        if excess > 0:
+            cur = self.conn.execute(
+                "DELETE FROM Landmarks WHERE key IN (SELECT key FROM Landmarks ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self._count -= cur.rowcount
+        self.conn.commit()
+        self._pending = 0
+
+    # Writes pending entries and closes the database. Does nothing if it is already closed.
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
@@ -0,0 +1,16 @@
+""" This finds the ArUco markers printed on the piano sheets, on both old and new OpenCV builds. """
+
+import cv2
+
+# Returns a function frame -> (corners, ids, rejected), the same result cv2.aruco.detectMarkers gives.
+# OpenCV 4.7+ builds without the legacy functions only have the ArucoDetector class, so that is used when present.
+def make_marker_detector(aruco_dict, params=None):
+    params = cv2.aruco.DetectorParameters() if params is None else params
+    if hasattr(cv2.aruco, "ArucoDetector"):
+        detector = cv2.aruco.ArucoDetector(aruco_dict, params)
+        return detector.detectMarkers
+
+    def detect(frame):
+        return cv2.aruco.detectMarkers(frame, aruco_dict, parameters=params)
+
+    return detect
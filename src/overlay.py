@@ -0,0 +1,71 @@
+""" This draws the key-zone overlay: either cached and stamped onto each frame, or sent to the browser as compact messages. """
+
+import json
+import numpy as np
+import cv2
+
+# Caches the grey key circles as a sparse layer (pixel indices + colors) and re-renders it only when the pose moves.
+class KeyOverlay:
+
+    # tolerance: how far (in pixels) a target may drift before the layer is redrawn.
+    # Marker corners jitter by a fraction of a pixel every frame, so a small tolerance keeps the layer cached.
+    def __init__(self, radius=15, color=(160, 160, 160), thickness=1, tolerance=1.0):
+        self.radius = radius
+        self.color = color
+        self.thickness = thickness
+        self.tolerance = tolerance
+        self._positions = None
+        self._shape = None
+        self._indices = None
+        self._pixels = None
+        self.renders = 0
+
+    # Draws the key zones onto a scratch image and keeps only the pixels that changed (the mask).
+    def _render(self, shape, positions):
+        layer = np.zeros(shape, dtype=np.uint8)
+        mask = np.zeros(shape[:2], dtype=np.uint8)
+        for x, y in positions:
+            center = (int(x), int(y))
+            cv2.circle(layer, center, self.radius, self.color, self.thickness)
+            cv2.circle(mask, center, self.radius, 255, self.thickness)
+
+        self._indices = np.flatnonzero(mask)
+        self._pixels = layer.reshape(-1, shape[2])[self._indices]
+        self._positions = np.array(positions, dtype=float)
+        self._shape = shape
+        self.renders += 1
+
+    # True when the cached layer still matches these targets.
+    def _is_current(self, shape, positions):
+        if self._positions is None or self._shape != shape or len(positions) != len(self._positions):
+            return False
+        if len(positions) == 0:
+            return True
+        return np.abs(np.asarray(positions, dtype=float) - self._positions).max() <= self.tolerance
+
+    # Composites the key zones onto frame (in place) with a single vectorized copy.
+    # frame must be C-contiguous (the pooled preview buffers are).
+    def draw(self, frame, positions):
+        if not frame.flags.c_contiguous:
+            raise ValueError("KeyOverlay.draw needs a C-contiguous frame")
+        if not self._is_current(frame.shape, positions):
+            self._render(frame.shape, positions)
+        frame.reshape(-1, frame.shape[2])[self._indices] = self._pixels
+
+# Builds the compact JSON message web/script.js uses to draw the overlay on a canvas above the video.
+# width/height: size of the frame the coordinates refer to. positions: (N, 2) key targets.
+# hits: indices of the keys being pressed. landmarks: (num_hands, 21, 3) normalized hand landmarks.
+# names: the note names of the keys, only needed when the sheet changes (None leaves them out).
+def build_overlay_message(width, height, positions, hits, landmarks, radius, names=None):
+    msg = {
+        "w": int(width),
+        "h": int(height),
+        "r": int(radius),
+        # Flat [x0, y0, x1, y1, ...] integer pixel coordinates.
+        "k": np.asarray(positions, dtype=float).round().astype(int).ravel().tolist(),
+        "hit": [int(i) for i in hits],
+        "l": (np.asarray(landmarks)[:, :, :2] * (width, height)).round().astype(int).reshape(len(landmarks), -1 if len(landmarks) else 0).tolist(),
+    }
+    if names is not None:
+        msg["n"] = list(names)
+    return json.dumps(msg, separators=(",", ":"))
@@ -1,61 +1,162 @@
 """ This manages the translation of "Where is my finger?" to "What note is this?" """
 
+import numpy as np
+
+# Note names inside one octave.
+NOTE_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+
+# The full 88-key keyboard, A0 (MIDI 21) to C8 (MIDI 108).
+KEY_MIDI = np.arange(21, 109)
+KEY_NAMES = [f"{NOTE_NAMES[m % 12]}{m // 12 - 1}" for m in KEY_MIDI]
+KEY_IS_BLACK = np.array(["#" in name for name in KEY_NAMES])
+
+# Printed sheet geometry (generator.py draws the pages from these same numbers).
+PAGE_WIDTH, PAGE_HEIGHT = 3508, 2480
+KEYS_TOP_RATIO = 0.25
+WHITE_KEYS_PER_PAGE = (9, 9, 9, 9, 9, 7)
+# Black keys are 55% as wide as a white key and 65% as long, centered on the line between two white keys.
+BLACK_KEY_WIDTH = 0.55
+BLACK_KEY_HEIGHT = 0.65
+# ArUco markers are 300px squares placed 150px in from the top-left and top-right corners.
+MARKER_MARGIN, MARKER_SIZE = 150, 300
+
+# Builds the key intervals along the keyboard, measured in white-key widths (white key k spans [k, k + 1]).
+def _build_key_intervals():
+    left = np.empty(len(KEY_MIDI))
+    right = np.empty(len(KEY_MIDI))
+    white = 0
+    for i, is_black in enumerate(KEY_IS_BLACK):
+        if is_black:
+            # Centered on the line to the right of the previous white key.
+            left[i] = white - BLACK_KEY_WIDTH / 2
+            right[i] = white + BLACK_KEY_WIDTH / 2
+        else:
+            left[i] = white
+            right[i] = white + 1
+            white += 1
+    return left, right
+
+KEY_LEFT, KEY_RIGHT = _build_key_intervals()
+KEY_CENTER = (KEY_LEFT + KEY_RIGHT) / 2
+
+# Sorted per-colour lookup tables (indices into the 88-key arrays and their left/right edges).
+WHITE_KEYS = np.flatnonzero(~KEY_IS_BLACK)
+BLACK_KEYS = np.flatnonzero(KEY_IS_BLACK)
+WHITE_LEFT = KEY_LEFT[WHITE_KEYS]
+BLACK_LEFT, BLACK_RIGHT = KEY_LEFT[BLACK_KEYS], KEY_RIGHT[BLACK_KEYS]
+
+# First white key (in white-key units) of every page.
+PAGE_START = np.concatenate(([0], np.cumsum(WHITE_KEYS_PER_PAGE)[:-1]))
+
+# Marker centers as a fraction of the page width.
+MARKER_LEFT_U = (MARKER_MARGIN + MARKER_SIZE / 2) / PAGE_WIDTH
+MARKER_RIGHT_U = (PAGE_WIDTH - MARKER_MARGIN - MARKER_SIZE / 2) / PAGE_WIDTH
+
+# Calibration that leaves the printed geometry untouched.
+IDENTITY_CONFIG = {"pad_l": 0.0, "pad_r": 0.0, "bias": 1.0}
+
+# Converts a note name (e.g. "C#4") to its MIDI number, or None if it is not a valid note.
+def note_to_midi(note):
+    try:
+        name, octave = note[:-1], int(note[-1])
+        return (octave + 1) * 12 + NOTE_NAMES.index(name)
+    except (ValueError, TypeError, IndexError):
+        return None
+
 class PianoMapper:
 
-    # Defines note_names (C through B). Sets default octave to 1.
+    # Starts on the first page (markers 0 and 1).
     def __init__(self):
-        self.note_names = [
-            "C",
-            "C#",
-            "D",
-            "D#",
-            "E",
-            "F",
-            "F#",
-            "G",
-            "G#",
-            "A",
-            "A#",
-            "B",
-        ]
-        self.current_start_octave = 1
+        self.page = None
+        self.active_indices = np.zeros(0, dtype=int)
         self.active_keys = []
-        self.update_active_keys()
+        self.set_sheet_by_id(0)
 
-    # Creates a list of strings (e.g., ["C1", "C#1", "D1"...]) for the current octave.
-    def update_active_keys(self):
+    # Takes the ArUco marker ID seen by the camera. Markers 2n and 2n+1 belong to page n.
+    # Returns False (and clears the active keys) for IDs that are not on any printed page.
+    def set_sheet_by_id(self, marker_id):
+        page = int(marker_id) // 2
+        if not 0 <= page < len(WHITE_KEYS_PER_PAGE):
+            self.page = None
+            self.active_indices = np.zeros(0, dtype=int)
+            self.active_keys = []
+            return False
 
-        # Strict 12-key generation
-        self.active_keys = [f"{note}{self.current_start_octave}" for note in self.note_names]
+        if page != self.page:
+            self.page = page
+            start = PAGE_START[page]
+            end = start + WHITE_KEYS_PER_PAGE[page]
 
-    # Takes the ArUco marker ID seen by the camera.
-    def set_sheet_by_id(self, marker_id):
+            # Every key whose center lies on the page, including half black keys on the seams.
+            self.active_indices = np.flatnonzero((KEY_CENTER >= start) & (KEY_CENTER <= end))
+            self.active_keys = [KEY_NAMES[i] for i in self.active_indices]
+        return True
+
+    # True for every active key that is black.
+    @property
+    def active_is_black(self):
+        return KEY_IS_BLACK[self.active_indices]
+
+    # Centers of the active keys as a fraction (0.0 to 1.0) of the page width.
+    @property
+    def active_centers(self):
+        return self.page_percent(KEY_CENTER[self.active_indices])
+
+    # Converts keyboard coordinates (white-key units) to page percentages and back.
+    def page_percent(self, x):
+        return (np.asarray(x, dtype=float) - PAGE_START[self.page]) / WHITE_KEYS_PER_PAGE[self.page]
+
+    def keyboard_position(self, u):
+        return PAGE_START[self.page] + np.asarray(u, dtype=float) * WHITE_KEYS_PER_PAGE[self.page]
+
+    # Maps many horizontal page positions at once.
+    # us: horizontal positions (0.0 to 1.0 across the page). black_row: True where the finger is in the
+    # upper part of the keys (where black keys exist). Returns indices into KEY_NAMES/KEY_MIDI, -1 if off the page.
+    def keys_at_percents(self, us, black_row=False):
+        if self.page is None:
+            return np.full(np.shape(us), -1, dtype=int)
+        us = np.asarray(us, dtype=float)
+        x = self.keyboard_position(us)
+
+        # White keys tile the keyboard, so the containing key is the last left edge <= x.
+        w = np.searchsorted(WHITE_LEFT, x, side="right") - 1
+        keys = WHITE_KEYS[np.clip(w, 0, len(WHITE_KEYS) - 1)]
 
-        # Calculates normalized_octave = (marker_id // 2) + 1. (e.g., Markers 0 and 1 -> Octave 1).
-        normalized_octave = int(marker_id // 2) + 1
+        # Black keys sit on top of the white keys in the upper row.
+        b = np.searchsorted(BLACK_LEFT, x, side="right") - 1
+        b_clipped = np.clip(b, 0, len(BLACK_KEYS) - 1)
+        on_black = np.asarray(black_row) & (b >= 0) & (x < BLACK_RIGHT[b_clipped])
+        keys = np.where(on_black, BLACK_KEYS[b_clipped], keys)
 
-        # Clamps value between 1 and 7.
-        if normalized_octave < 1:
-            normalized_octave = 1
-        if normalized_octave > 7:
-            normalized_octave = 7
+        return np.where((us >= 0) & (us < 1.0), keys, -1)
 
-        # Updates active_keys if the octave changed.
-        if self.current_start_octave != normalized_octave:
-            self.current_start_octave = normalized_octave
-            self.update_active_keys()
+    # Takes u (0.0 to 1.0), representing the horizontal position on the paper, and returns the note name.
+    def get_note_at_percent(self, u, black_row=False):
+        idx = int(self.keys_at_percents(u, black_row))
+        return KEY_NAMES[idx] if idx >= 0 else None
 
-    def get_note_at_percent(self, u):
+    # Projects the active keys onto the camera image.
+    # p_left/p_right are the left and right marker centers on screen. config is a per-sheet calibration
+    # (pad_l/pad_r squeeze the keys in from the page edges, bias bends the spacing).
+    # Each hit zone is pushed "down" the paper by offset_white / offset_black pixels (the zig-zag layout).
+    # Returns an (N, 2) float array of target centers, in the same order as active_keys.
+    def key_targets(self, p_left, p_right, config=IDENTITY_CONFIG, offset_white=130, offset_black=90):
+        bx = p_right[0] - p_left[0]
+        by = p_right[1] - p_left[1]
 
-        # Takes u (0.0 to 1.0), representing the horizontal position on the paper.
-        if u < 0 or u >= 1.0:
-            return None
+        # The perpendicular vector pointing "downward" on the paper.
+        mag = (bx ** 2 + by ** 2) ** 0.5
+        perp = np.array([by, -bx]) / mag if mag > 0 else np.array([0.0, -1.0])
 
-        # Maps this percentage to an index in the active_keys list.
-        idx = int(u * len(self.active_keys))
+        # Applies the per-sheet calibration to the printed key centers (page percentages).
+        u_biased = self.active_centers ** config["bias"]
+        u_page = config["pad_l"] + u_biased * (1.0 - (config["pad_l"] + config["pad_r"]))
 
-        # Returns the specific note name (e.g., "C#3").
-        if 0 <= idx < len(self.active_keys):
-            return self.active_keys[idx]
+        # Re-expresses them relative to the marker centers (0.0 = left marker, 1.0 = right marker).
+        u = (u_page - MARKER_LEFT_U) / (MARKER_RIGHT_U - MARKER_LEFT_U)
 
-        return None
\ No newline at end of file
+        offsets = np.where(self.active_is_black, offset_black, offset_white)
+        targets = np.empty((len(u), 2))
+        targets[:, 0] = p_left[0] + bx * u + perp[0] * offsets
+        targets[:, 1] = p_left[1] + by * u + perp[1] * offsets
+        return targets
@@ -0,0 +1,224 @@
+""" This follows a target piece while the user plays: it loads the expected notes and aligns the live notes against them. """
+
+import struct
+from collections import namedtuple
+import numpy as np
+
+from src.piano_logic import KEY_NAMES, KEY_MIDI, note_to_midi
+
+# One expected note: onset time in seconds from the start of the piece, and its MIDI number.
+ExpectedNote = namedtuple("ExpectedNote", ["time", "midi"])
+
+# What the aligner decided about one played note.
+# expected/index: the expected note it was matched to (None / -1 for an extra note).
+# timing_error: seconds early (<0) or late (>0), None when unknown. progress: expected notes covered so far.
+PracticeResult = namedtuple(
+    "PracticeResult", ["played", "expected", "index", "correct", "timing_error", "progress", "total"]
+)
+
+# MIDI channel 10 (index 9) is percussion, not piano notes.
+DRUM_CHANNEL = 9
+
+# Converts a MIDI number to a note name (e.g. 61 -> "C#4").
+def midi_to_name(midi):
+    i = int(midi) - int(KEY_MIDI[0])
+    return KEY_NAMES[i] if 0 <= i < len(KEY_NAMES) else str(midi)
+
+# Reads a MIDI variable-length number. Returns (value, new position).
+def _read_varlen(data, pos):
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos
+
+# Loads the note-on events of a Standard MIDI File (format 0 or 1) as a time-sorted list of ExpectedNotes.
+def load_midi_notes(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != b"MThd":
+        raise ValueError(f"{path} is not a MIDI file")
+
+    header_len = struct.unpack(">I", data[4:8])[0]
+    _, num_tracks, division = struct.unpack(">HHH", data[8:14])
+    if division & 0x8000:
+        raise ValueError("SMPTE time division is not supported")
+
+    # Collects (tick, midi) note-ons and (tick, microseconds per quarter) tempo changes from every track.
+    notes, tempos = [], []
+    pos = 8 + header_len
+    for _ in range(num_tracks):
+        if data[pos : pos + 4] != b"MTrk":
+            raise ValueError("Malformed MIDI track")
+        end = pos + 8 + struct.unpack(">I", data[pos + 4 : pos + 8])[0]
+        pos += 8
+        tick, status = 0, 0
+        while pos < end:
+            delta, pos = _read_varlen(data, pos)
+            tick += delta
+            if data[pos] & 0x80:
+                status = data[pos]
+                pos += 1
+
+            if status == 0xFF:
+                # Meta event (0x51 = tempo).
+                meta_type = data[pos]
+                length, pos = _read_varlen(data, pos + 1)
+                if meta_type == 0x51:
+                    tempos.append((tick, int.from_bytes(data[pos : pos + 3], "big")))
+                pos += length
+            elif status in (0xF0, 0xF7):
+                # SysEx (skipped).
+                length, pos = _read_varlen(data, pos)
+                pos += length
+            else:
+                kind, channel = status & 0xF0, status & 0x0F
+                if kind in (0xC0, 0xD0):
+                    pos += 1
+                    continue
+                key, velocity = data[pos], data[pos + 1]
+                pos += 2
+                if kind == 0x90 and velocity > 0 and channel != DRUM_CHANNEL:
+                    notes.append((tick, key))
+        pos = end
+
+    # Converts ticks to seconds with the tempo map (120 BPM until the first tempo event).
+    tempos.sort()
+    seconds = []
+    for tick, _ in notes:
+        t, last_tick, tempo = 0.0, 0, 500000
+        for change_tick, change_tempo in tempos:
+            if change_tick >= tick:
+                break
+            t += (change_tick - last_tick) * tempo / (division * 1e6)
+            last_tick, tempo = change_tick, change_tempo
+        seconds.append(t + (tick - last_tick) * tempo / (division * 1e6))
+
+    # Chords are ordered low to high.
+    return sorted(ExpectedNote(t, key) for t, (_, key) in zip(seconds, notes))
+
+# Loads a plain text file of note names ("C4 D4 E4 ..."). There are no onset times, so timing is not scored.
+def load_text_notes(path):
+    with open(path) as f:
+        names = f.read().split()
+    notes = []
+    for name in names:
+        midi = note_to_midi(name)
+        if midi is None:
+            raise ValueError(f"Unknown note name: {name}")
+        notes.append(ExpectedNote(None, midi))
+    return notes
+
+# Loads the expected notes from a .mid/.midi file or a text file of note names.
+def load_expected_notes(path):
+    if path.lower().endswith((".mid", ".midi")):
+        return load_midi_notes(path)
+    return load_text_notes(path)
+
+# Aligns the live note stream against the expected notes as it arrives.
+# This is an edit-distance style DTW that only keeps a fixed window of expected notes around the current position,
+# so each played note costs O(window) no matter how long the piece is.
+class StreamingAligner:
+
+    # window: how many expected notes are considered at once. Wrong notes cost `substitution`,
+    # extra played notes cost `insertion`, and expected notes that were skipped cost `deletion`.
+    # tempo_follow: how quickly (0 to 1) the time offset follows the player's tempo.
+    def __init__(self, expected, window=16, substitution=1.0, insertion=1.0, deletion=0.6, tempo_follow=0.2):
+        self.expected = list(expected)
+        self.window = window
+        self.substitution = substitution
+        self.insertion = insertion
+        self.deletion = deletion
+        self.tempo_follow = tempo_follow
+
+        # cost[k] is the cheapest alignment that consumed the expected notes up to index lo + k - 1
+        # (cost[0] = none of the notes inside the window consumed yet).
+        self.lo = 0
+        self.cost = self.deletion * np.arange(self.window + 1, dtype=float)
+        self.position = 0
+        self.offset = None
+        self.played = 0
+        self.correct = 0
+        # Index of the last expected note credited as correct. No played note is matched at or before it again.
+        self.last_credited = -1
+
+    # True once the last expected note has been matched or passed.
+    @property
+    def finished(self):
+        return self.position >= len(self.expected)
+
+    # Fraction of played notes that were correct.
+    @property
+    def accuracy(self):
+        return self.correct / self.played if self.played else 0.0
+
+    # Feeds one played note (MIDI number, time in seconds) and returns its PracticeResult.
+    def add(self, midi, played_time=None):
+        n = len(self.expected)
+        hi = min(self.lo + self.window, n)
+        width = hi - self.lo
+        prev = self.cost
+        row = np.full(self.window + 1, np.inf)
+        step = np.zeros(self.window + 1, dtype=np.int8)
+
+        # Row start: the played note is an extra note before anything in the window.
+        row[0] = prev[0] + self.insertion
+        for k in range(1, width + 1):
+            j = self.lo + k - 1
+            match = prev[k - 1] + (0.0 if self.expected[j].midi == midi else self.substitution)
+            extra = prev[k] + self.insertion
+            skip = row[k - 1] + self.deletion
+            # Records which move was cheapest (0 = match, 1 = extra note, 2 = skipped expected note).
+            # A tie between a match and an extra note counts as extra, so a repeated note is not credited twice.
+            row[k], step[k] = min((extra, 1), (match, 0), (skip, 2), key=lambda move: move[0])
+
+        # Picks the cheapest end point, then walks back over skipped notes to find what this played note did.
+        best = int(np.argmin(row[: width + 1]))
+        k = best
+        while k > 0 and step[k] == 2:
+            k -= 1
+        self.cost = row
+        self.played += 1
+
+        if k == 0 or step[k] == 1 or self.lo + k - 1 <= self.last_credited:
+            result_index = -1
+        else:
+            result_index = self.lo + k - 1
+        self.position = max(self.position, self.lo + best)
+
+        result = self._score(midi, played_time, result_index)
+        self._slide(best)
+        return result
+
+    # Builds the PracticeResult and keeps the timing offset in step with the player.
+    def _score(self, midi, played_time, index):
+        if index < 0:
+            return PracticeResult(midi_to_name(midi), None, -1, False, None, self.position, len(self.expected))
+
+        expected = self.expected[index]
+        correct = expected.midi == midi
+        timing_error = None
+        if correct and played_time is not None and expected.time is not None:
+            if self.offset is None:
+                self.offset = played_time - expected.time
+            timing_error = (played_time - self.offset) - expected.time
+            self.offset += self.tempo_follow * timing_error
+        if correct:
+            self.correct += 1
+            self.last_credited = index
+
+        return PracticeResult(
+            midi_to_name(midi), midi_to_name(expected.midi), index, correct, timing_error, self.position, len(self.expected)
+        )
+
+    # Moves the window forward so the best position sits a quarter of the way in.
+    def _slide(self, best):
+        shift = min(max(0, best - self.window // 4), max(0, len(self.expected) - self.lo - 1))
+        if shift:
+            self.lo += shift
+            self.cost = np.concatenate((self.cost[shift:], np.full(shift, np.inf)))
+            # Notes entering the window can only be reached by skipping from the ones before them.
+            for k in range(self.window + 1 - shift, self.window + 1):
+                self.cost[k] = self.cost[k - 1] + self.deletion
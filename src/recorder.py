@@ -0,0 +1,247 @@
+""" This records live sessions (raw frames, ArUco corners, hand landmarks, and emitted notes) into a memory-mapped container that can be replayed without any video decoding. """
+
+import os
+import json
+import time
+import numpy as np
+
+from src.hands import NUM_LANDMARKS, MAX_HANDS, empty_hands
+
+# Container layout (one directory per recording):
+#   header.json  - frame shape and format version.
+#   frames.bin   - raw uint8 frames, back to back (a memory-mapped array of shape (N, H, W, 3)).
+#   index.bin    - one fixed-size RECORD_DTYPE entry per frame (the seekable index).
+HEADER_FILE = "header.json"
+FRAMES_FILE = "frames.bin"
+INDEX_FILE = "index.bin"
+FORMAT_VERSION = 1
+
+# Fixed per-frame capacity. Anything beyond this is dropped from the index (the frame itself is always kept).
+MAX_MARKERS = 8
+MAX_NOTES = 8
+
+# One index entry per frame. Note names are stored as bytes (e.g. b"C#4").
+RECORD_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),
+        ("num_markers", "u1"),
+        ("marker_ids", "<i2", (MAX_MARKERS,)),
+        ("marker_corners", "<f4", (MAX_MARKERS, 4, 2)),
+        ("num_hands", "u1"),
+        ("handedness", "i1", (MAX_HANDS,)),
+        ("landmarks", "<f4", (MAX_HANDS, NUM_LANDMARKS, 3)),
+        ("num_notes", "u1"),
+        ("notes", "S3", (MAX_NOTES,)),
+    ]
+)
+
+# Appends frames and their per-frame data to a recording directory.
+class RecordingWriter:
+
+    # The files are created when the first frame arrives (the frame shape is not known before that).
+    def __init__(self, path):
+        self.path = path
+        self.frame_shape = None
+        self.count = 0
+        self._frames_file = None
+        self._index_file = None
+
+        # A single reusable index entry, so appending does not allocate per frame.
+        self._record = np.zeros(1, dtype=RECORD_DTYPE)
+
+    def _open(self, frame_shape):
+        os.makedirs(self.path, exist_ok=True)
+        self.frame_shape = tuple(int(d) for d in frame_shape)
+        with open(os.path.join(self.path, HEADER_FILE), "w") as f:
+            json.dump({"version": FORMAT_VERSION, "frame_shape": self.frame_shape, "dtype": "uint8"}, f)
+        self._frames_file = open(os.path.join(self.path, FRAMES_FILE), "wb")
+        self._index_file = open(os.path.join(self.path, INDEX_FILE), "wb")
+
+    # Writes one frame and everything the app saw/emitted for it.
+    # corners/ids come straight from cv2.aruco.detectMarkers, landmarks/handedness from src.hands.results_to_arrays.
+    def append(self, frame, corners=None, ids=None, landmarks=None, handedness=None, notes=(), timestamp=None):
+        if self._frames_file is None:
+            self._open(frame.shape)
+        if tuple(frame.shape) != self.frame_shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match recording shape {self.frame_shape}")
+
+        rec = self._record[0]
+        rec["timestamp"] = time.time() if timestamp is None else timestamp
+
+        # Markers (cv2 gives corners as a list of (1, 4, 2) arrays and ids as an (N, 1) array).
+        num_markers = 0
+        if ids is not None and corners is not None:
+            num_markers = min(len(ids), MAX_MARKERS)
+            for i in range(num_markers):
+                rec["marker_ids"][i] = int(np.ravel(ids[i])[0])
+                rec["marker_corners"][i] = np.reshape(corners[i], (4, 2))
+        rec["num_markers"] = num_markers
+
+        # Hands.
+        num_hands = 0
+        if landmarks is not None:
+            num_hands = min(len(landmarks), MAX_HANDS)
+            rec["landmarks"][:num_hands] = landmarks[:num_hands]
+            rec["handedness"][:num_hands] = -1 if handedness is None else handedness[:num_hands]
+        rec["num_hands"] = num_hands
+
+        # Notes emitted on this frame.
+        num_notes = min(len(notes), MAX_NOTES)
+        for i in range(num_notes):
+            rec["notes"][i] = notes[i].encode("ascii")
+        rec["num_notes"] = num_notes
+
+        # Writes straight from the array memory (no intermediate bytes copy of the frame).
+        self._frames_file.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+        self._index_file.write(memoryview(self._record).cast("B"))
+        self.count += 1
+
+    # Flushes the files so a reader can see every appended frame.
+    def flush(self):
+        if self._frames_file is not None:
+            self._frames_file.flush()
+            self._index_file.flush()
+
+    def close(self):
+        if self._frames_file is not None:
+            self._frames_file.close()
+            self._index_file.close()
+            self._frames_file = None
+            self._index_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Read-only, memory-mapped view of a recording. Indexing and slicing never decode or copy frames.
+class Recording:
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, HEADER_FILE)) as f:
+            header = json.load(f)
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording version: {header.get('version')}")
+        self.frame_shape = tuple(header["frame_shape"])
+
+        # Uses whichever file is shorter, so a recording cut off mid-write is still readable.
+        frame_bytes = int(np.prod(self.frame_shape))
+        frames_path = os.path.join(path, FRAMES_FILE)
+        index_path = os.path.join(path, INDEX_FILE)
+        count = min(os.path.getsize(frames_path) // frame_bytes, os.path.getsize(index_path) // RECORD_DTYPE.itemsize)
+
+        # np.memmap cannot map an empty file.
+        if count == 0:
+            self.frames = np.zeros((0,) + self.frame_shape, dtype=np.uint8)
+            self.index = np.zeros(0, dtype=RECORD_DTYPE)
+        else:
+            self.frames = np.memmap(frames_path, dtype=np.uint8, mode="r", shape=(count,) + self.frame_shape)
+            self.index = np.memmap(index_path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+    def __len__(self):
+        return len(self.index)
+
+    # Timestamps of every frame (seconds since the epoch).
+    @property
+    def timestamps(self):
+        return self.index["timestamp"]
+
+    # Returns the frame number closest to (at or after) a time offset in seconds from the start.
+    def seek(self, seconds):
+        if len(self) == 0:
+            return 0
+        target = self.timestamps[0] + seconds
+        return int(min(np.searchsorted(self.timestamps, target), len(self) - 1))
+
+    # Returns the markers of frame i in the same format cv2.aruco.detectMarkers uses: (corners, ids).
+    def markers(self, i):
+        rec = self.index[i]
+        n = int(rec["num_markers"])
+        if n == 0:
+            return (), None
+        corners = tuple(np.array(rec["marker_corners"][j]).reshape(1, 4, 2) for j in range(n))
+        ids = np.array(rec["marker_ids"][:n], dtype=np.int32).reshape(-1, 1)
+        return corners, ids
+
+    # Returns (landmarks, handedness) of frame i, the same format as src.hands.results_to_arrays.
+    def hands(self, i):
+        rec = self.index[i]
+        n = int(rec["num_hands"])
+        if n == 0:
+            return empty_hands()
+        return np.array(rec["landmarks"][:n]), np.array(rec["handedness"][:n])
+
+    # Returns the note names emitted on frame i.
+    def notes(self, i):
+        rec = self.index[i]
+        return [n.decode("ascii") for n in rec["notes"][: int(rec["num_notes"])]]
+
+# Mimics cv2.VideoCapture so the CV loop can read frames from a recording instead of a camera.
+class RecordingCapture:
+
+    # realtime=False replays as fast as the loop can go. realtime=True sleeps to keep the original pace.
+    def __init__(self, recording, start=0, stop=None, realtime=False):
+        self.recording = recording if isinstance(recording, Recording) else Recording(recording)
+        self.position = start
+        self.stop = len(self.recording) if stop is None else min(stop, len(self.recording))
+        self.realtime = realtime
+        self._clock_start = None
+
+        # Frame number and recorded time (seconds since the epoch) of the frame returned by the last read().
+        self.index = None
+        self.timestamp = None
+
+    def isOpened(self):
+        return True
+
+    # True once every frame in the range has been read.
+    @property
+    def finished(self):
+        return self.position >= self.stop
+
+    # Camera properties (resolution etc.) are fixed by the recording.
+    def set(self, prop, value):
+        return False
+
+    def read(self):
+        if self.finished:
+            return False, None
+        i = self.position
+        self.position += 1
+
+        if self.realtime:
+            ts = self.recording.timestamps
+            if self._clock_start is None:
+                self._clock_start = time.perf_counter() - (ts[i] - ts[0])
+            delay = (ts[i] - ts[0]) - (time.perf_counter() - self._clock_start)
+            if delay > 0:
+                time.sleep(delay)
+
+        self.index = i
+        self.timestamp = float(self.recording.timestamps[i])
+        return True, self.recording.frames[i]
+
+    def release(self):
+        self.position = self.stop
+
+# Replays what the app saw live: hands in the src.hands.HandDetector format and markers in the
+# cv2.aruco.detectMarkers format, taken from the recording for the frame the capture read last.
+# No model runs, so a replay reproduces the live session exactly and costs no inference.
+class RecordedDetections:
+
+    def __init__(self, capture):
+        self.capture = capture
+
+    # Same call as HandDetector.process (the frame itself is not looked at).
+    def process(self, rgb):
+        return self.capture.recording.hands(self.capture.index)
+
+    # Same result as cv2.aruco.detectMarkers: (corners, ids, rejected).
+    def detect_markers(self, frame):
+        corners, ids = self.capture.recording.markers(self.capture.index)
+        return corners, ids, ()
+
+    def close(self):
+        pass
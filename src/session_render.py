@@ -0,0 +1,145 @@
+""" This renders a logged session (the Notes of one session in MusicDB) to a WAV file, offline and much faster than real time. """
+
+import os
+import sys
+import wave
+import heapq
+import argparse
+from datetime import datetime
+import numpy as np
+from fluidsynth import Synth
+
+# Add the parent directory to Python system's path so we can import 'src'.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio_engine import DEFAULT_VELOCITY, SOUNDFONT_PATH
+from src.db_manager import MusicDB
+from src.piano_logic import note_to_midi
+
+SAMPLE_RATE = 44100
+
+# Frames rendered per FluidSynth call (about 1.5 s of audio). Memory use depends on this, not on the session length.
+BLOCK_FRAMES = 65536
+
+# The Notes table only stores when each key was pressed, so every note is held for this long (seconds).
+NOTE_LENGTH = 0.4
+
+# Silence before the first note and after the last one (seconds).
+LEAD_IN = 0.5
+TAIL = 2.0
+
+# Returns the id of the most recent session.
+def latest_session(db):
+    row = db.conn.execute("SELECT MAX(id) FROM Sessions").fetchone()
+    return row[0]
+
+# Yields (seconds, kind, midi) note events for a session in time order, kind being "on" or "off".
+# Notes are read from the database in chunks, and only the notes still sounding are kept in memory.
+# max_gap: silences longer than this (seconds) are shortened to it. None keeps the real timing.
+def session_events(db, session_id, note_length=NOTE_LENGTH, max_gap=None):
+    # Pending note-offs: (time, midi, time of the note-on it ends).
+    offs = []
+    # When each note was last struck, so an early note-off cannot cut a note that was struck again.
+    last_on = {}
+    start = prev = None
+    shift = 0.0
+
+    for rows in db.iter_chunks("Notes", session_ids=[session_id]):
+        for _, _, note, timestamp in rows:
+            midi = note if isinstance(note, int) else note_to_midi(note)
+            if midi is None:
+                continue
+            real = datetime.fromisoformat(timestamp).timestamp()
+            if start is None:
+                start = prev = real
+
+            # Shortens long silences.
+            if max_gap is not None and real - prev > max_gap:
+                shift += real - prev - max_gap
+            prev = real
+            t = LEAD_IN + real - start - shift
+
+            while offs and offs[0][0] <= t:
+                off_time, off_midi, struck = heapq.heappop(offs)
+                if last_on.get(off_midi) == struck:
+                    del last_on[off_midi]
+                    yield off_time, "off", off_midi
+
+            # A note that is still sounding is released before it is struck again (like AudioEngine does).
+            if midi in last_on:
+                yield t, "off", midi
+            last_on[midi] = t
+            yield t, "on", midi
+            heapq.heappush(offs, (t + note_length, midi, t))
+
+    while offs:
+        off_time, off_midi, struck = heapq.heappop(offs)
+        if last_on.get(off_midi) == struck:
+            del last_on[off_midi]
+            yield off_time, "off", off_midi
+
+# Renders the events of a session to a 16-bit stereo WAV file and returns its length in seconds.
+# FluidSynth is driven directly (get_samples) without an audio driver, and every block goes straight to disk.
+def render_session(
+    db,
+    session_id,
+    out_path,
+    soundfont=SOUNDFONT_PATH,
+    note_length=NOTE_LENGTH,
+    max_gap=None,
+    velocity=DEFAULT_VELOCITY,
+    sample_rate=SAMPLE_RATE,
+    block_frames=BLOCK_FRAMES,
+):
+    if not os.path.exists(soundfont):
+        raise FileNotFoundError(f"Soundfont not found at {soundfont}")
+
+    fs = Synth(samplerate=float(sample_rate))
+    fs.program_select(0, fs.sfload(soundfont), 0, 0)
+    # Sets Channel 0 volume to Max (same as the live AudioEngine).
+    fs.cc(0, 7, 127)
+
+    position = 0
+    with wave.open(out_path, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+
+        # Renders audio up to a frame number, block by block.
+        def render_until(frame):
+            nonlocal position
+            while position < frame:
+                n = min(block_frames, frame - position)
+                wav.writeframes(np.asarray(fs.get_samples(n), dtype=np.int16).tobytes())
+                position += n
+
+        last = 0.0
+        for t, kind, midi in session_events(db, session_id, note_length, max_gap):
+            render_until(int(round(t * sample_rate)))
+            if kind == "on":
+                fs.noteon(0, midi, int(velocity))
+            else:
+                fs.noteoff(0, midi)
+            last = t
+
+        # Lets the last notes ring out.
+        render_until(int(round((last + TAIL) * sample_rate)))
+
+    fs.delete()
+    return position / sample_rate
+
+# Ensures the function only runs if the file is executed directly (python -m src.session_render ...).
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a practice session to a WAV file")
+    parser.add_argument("session", help="session id, or 'latest'")
+    parser.add_argument("out", help="WAV file to write")
+    parser.add_argument("--db", default="assets/database/piano_stats.db", help="database file (default: %(default)s)")
+    parser.add_argument("--soundfont", default=SOUNDFONT_PATH, help="SoundFont to play the notes with")
+    parser.add_argument("--note-length", type=float, default=NOTE_LENGTH, help="seconds each note is held (default: %(default)s)")
+    parser.add_argument("--max-gap", type=float, help="shorten silences longer than this many seconds")
+    args = parser.parse_args()
+
+    db = MusicDB(args.db)
+    session_id = latest_session(db) if args.session == "latest" else int(args.session)
+    seconds = render_session(db, session_id, args.out, args.soundfont, args.note_length, args.max_gap)
+    print(f"Rendered session {session_id} ({seconds:.1f} s of audio) to {args.out}")
@@ -0,0 +1,78 @@
+""" Unit tests for the Audio Engine (FluidSynth is mocked in conftest.py). """
+
+from types import SimpleNamespace
+
+from src import audio_engine
+
+# Checks note_off releases a note and is ignored for notes that are not sounding.
+def test_note_off(mock_audio_engine):
+    mock_audio_engine.note_on("C4", 90)
+    mock_audio_engine.fs.noteon.assert_called_with(0, 60, 90)
+    assert mock_audio_engine.held_notes == 1
+
+    mock_audio_engine.note_off("C4")
+    mock_audio_engine.fs.noteoff.assert_called_with(0, 60)
+    assert mock_audio_engine.held_notes == 0
+
+    mock_audio_engine.fs.noteoff.reset_mock()
+    mock_audio_engine.note_off("D4")
+    mock_audio_engine.fs.noteoff.assert_not_called()
+
+# Checks a note held by two fingers keeps sounding until both let go.
+def test_shared_note(mock_audio_engine):
+    mock_audio_engine.note_on("C4")
+    mock_audio_engine.note_on("C4")
+    mock_audio_engine.note_off("C4")
+    assert mock_audio_engine.held_notes == 1
+    mock_audio_engine.note_off("C4")
+    assert mock_audio_engine.held_notes == 0
+
+# Checks the polyphony cap steals the oldest note.
+def test_polyphony_cap(mock_audio_engine):
+    mock_audio_engine.max_polyphony = 3
+    for note in ["C4", "D4", "E4", "F4"]:
+        mock_audio_engine.note_on(note)
+
+    assert list(mock_audio_engine.active) == [62, 64, 65]
+    mock_audio_engine.fs.noteoff.assert_called_with(0, 60)
+    stats = mock_audio_engine.stats()
+    assert stats["voices_stolen"] == 1
+    assert stats["peak_held_notes"] == 3
+
+# Checks the speed-to-velocity curve is clamped and monotonic.
+def test_velocity_from_speed(mock_audio_engine):
+    v = [mock_audio_engine.velocity_from_speed(s) for s in (50, 400, 800, 1500, 5000)]
+    assert v == sorted(v)
+    assert v[0] == 40 and v[-1] == 127
+    assert mock_audio_engine.velocity_from_speed(None) == 100
+
+# Checks the velocity never drops as the speed goes up, starting from a finger that stopped on the key.
+def test_velocity_is_monotonic(mock_audio_engine):
+    v = [mock_audio_engine.velocity_from_speed(s) for s in range(0, 3000, 10)]
+    assert all(a <= b for a, b in zip(v, v[1:]))
+    assert v[0] == 40
+
+# Checks the voice count and load come from FluidSynth when it can be asked, so release tails are counted.
+def test_synth_voices_and_load(mock_audio_engine, monkeypatch):
+    def voice_count(synth):
+        return 5
+
+    def cpu_load(synth):
+        return 12.5
+
+    lib = SimpleNamespace(fluid_synth_get_active_voice_count=voice_count, fluid_synth_get_cpu_load=cpu_load)
+    monkeypatch.setattr(audio_engine, "fluidsynth", SimpleNamespace(_fl=lib))
+    mock_audio_engine.fs.synth = 0x1234
+    mock_audio_engine.note_on("C4")
+    mock_audio_engine.note_off("C4")
+
+    stats = mock_audio_engine.stats()
+    assert stats["active_voices"] == 5
+    assert stats["held_notes"] == 0
+    assert stats["cpu_load"] == 12.5
+
+# Checks the held notes stand in for the voice count when FluidSynth cannot be asked.
+def test_synth_voices_fallback(mock_audio_engine):
+    mock_audio_engine.note_on("C4")
+    assert mock_audio_engine.active_voices == 1
+    assert mock_audio_engine.cpu_load is None
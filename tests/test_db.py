@@ -39,4 +39,101 @@ def test_log_note(db):
 
     assert result is not None
     assert result[0] == 60
-    assert result[1] == session_id
\ No newline at end of file
+    assert result[1] == session_id
+
+# Checks a practice result is stored with its session.
+def test_log_practice_result(db):
+    from src.practice import PracticeResult
+
+    session_id = db.start_session()
+    db.log_practice_result(session_id, PracticeResult("C4", "C4", 0, True, 0.02, 1, 8))
+
+    cursor = db.conn.cursor()
+    cursor.execute("SELECT note, expected_note, correct, timing_error FROM PracticeResults WHERE session_id=?", (session_id,))
+    assert cursor.fetchone() == ("C4", "C4", 1, 0.02)
+
+# Adds two sessions with notes at fixed times (one in January, one in March).
+def _seed(db):
+    cur = db.conn.cursor()
+    cur.execute("INSERT INTO Sessions (timestamp) VALUES ('2026-01-10T09:00:00')")
+    old = cur.lastrowid
+    cur.execute("INSERT INTO Sessions (timestamp) VALUES ('2026-03-10T09:00:00')")
+    new = cur.lastrowid
+    for i in range(5):
+        cur.execute("INSERT INTO Notes (session_id, note, timestamp) VALUES (?, ?, ?)", (old, "C4", f"2026-01-10T09:00:0{i}"))
+        cur.execute("INSERT INTO Notes (session_id, note, timestamp) VALUES (?, ?, ?)", (new, "D4", f"2026-03-10T09:00:0{i}"))
+    db.conn.commit()
+    return old, new
+
+# Checks rows come back in bounded chunks and the filters are applied.
+def test_iter_chunks_filters(db):
+    old, new = _seed(db)
+
+    chunks = list(db.iter_chunks("Notes", chunk_size=3))
+    assert [len(c) for c in chunks] == [3, 3, 3, 1]
+
+    rows = [r for c in db.iter_chunks("Notes", session_ids=[new], chunk_size=3) for r in c]
+    assert len(rows) == 5 and all(r[1] == new for r in rows)
+
+    rows = [r for c in db.iter_chunks("Notes", start="2026-02-01", end="2026-04-01") for r in c]
+    assert {r[2] for r in rows} == {"D4"}
+
+# Checks the CSV and .npz exports contain every selected row.
+def test_export_csv_and_npz(db, tmp_path):
+    import csv
+    import numpy as np
+
+    old, _ = _seed(db)
+
+    counts = db.export(str(tmp_path / "csv"), session_ids=[old])
+    assert counts == {"Sessions": 1, "Notes": 5}
+    with open(tmp_path / "csv" / "Notes.csv") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["id", "session_id", "note", "timestamp"]
+    assert len(rows) == 6
+
+    counts = db.export(str(tmp_path / "npz"), tables=("Notes",), fmt="npz", chunk_size=4)
+    assert counts == {"Notes": 10}
+    first = np.load(tmp_path / "npz" / "Notes-00000.npz")
+    assert first["session_id"].dtype == np.int64
+    assert list(first["note"]) == ["C4", "D4", "C4", "D4"]
+    assert sorted(p.name for p in (tmp_path / "npz").iterdir()) == ["Notes-00000.npz", "Notes-00001.npz", "Notes-00002.npz"]
+
+# Checks the Parquet schema comes from the column types: a column that is NULL in the first chunk keeps its
+# type, and a note column mixing MIDI numbers and names is written as text.
+def test_export_parquet_schema(db, tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    session_id = db.start_session()
+    cur = db.conn.cursor()
+    for timing_error in (None, None, 0.02, -0.01):
+        cur.execute("INSERT INTO PracticeResults (session_id, timing_error) VALUES (?, ?)", (session_id, timing_error))
+    cur.execute("INSERT INTO Notes (session_id, note) VALUES (?, ?)", (session_id, 60))
+    cur.execute("INSERT INTO Notes (session_id, note) VALUES (?, ?)", (session_id, "C4"))
+    db.conn.commit()
+
+    counts = db.export(str(tmp_path), tables=("PracticeResults", "Notes"), fmt="parquet", chunk_size=2)
+    assert counts == {"PracticeResults": 4, "Notes": 2}
+
+    results = pq.read_table(tmp_path / "PracticeResults.parquet")
+    assert results.schema.field("timing_error").type == pa.float64()
+    assert results.schema.field("expected_index").type == pa.int64()
+    assert results.column("timing_error").to_pylist() == [None, None, 0.02, -0.01]
+
+    notes = pq.read_table(tmp_path / "Notes.parquet")
+    assert notes.schema.field("note").type == pa.string()
+    assert notes.column("note").to_pylist() == ["60", "C4"]
+
+# Checks old sessions are removed together with their notes, and newer ones are kept.
+def test_compact(db):
+    old, new = _seed(db)
+
+    counts = db.compact("2026-02-01", chunk_size=2)
+    assert counts == {"Notes": 5, "PracticeResults": 0, "Sessions": 1}
+
+    cursor = db.conn.cursor()
+    cursor.execute("SELECT DISTINCT session_id FROM Notes")
+    assert cursor.fetchall() == [(new,)]
+    cursor.execute("SELECT id FROM Sessions")
+    assert cursor.fetchall() == [(new,)]
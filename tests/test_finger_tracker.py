@@ -0,0 +1,71 @@
+""" Unit tests for the press/release state machine. """
+
+import pytest
+
+from src.finger_tracker import FingerTracker, fingertip_ids
+
+TARGETS = [(100, 100), (140, 100)]
+NAMES = ["C4", "D4"]
+INDEX = ("Right", 8)
+
+# Feeds a sequence of (time, x) positions for one fingertip and returns every event.
+def run(tracker, path, finger=INDEX, z=0.0):
+    events = []
+    for t, x in path:
+        events += tracker.update({finger: (x, 100, z)}, TARGETS, NAMES, t)
+    return events
+
+# Checks a press fires on the very first frame inside press_radius, with a matching release.
+def test_press_is_immediate_and_matched():
+    tracker = FingerTracker(press_radius=15, release_radius=20, min_dwell=0.05)
+    events = run(tracker, [(0.00, 60), (0.03, 95), (0.06, 97), (0.20, 70)])
+
+    assert [(e.kind, e.note, e.time) for e in events] == [("on", "C4", 0.03), ("off", "C4", 0.20)]
+    # Approached from 40px away to 5px away in 30ms.
+    assert events[0].speed == pytest.approx(35 / 0.03)
+
+# Checks a fingertip hovering on the press boundary does not retrigger (hysteresis).
+def test_boundary_jitter_does_not_retrigger():
+    tracker = FingerTracker(press_radius=15, release_radius=20, min_dwell=0.05)
+    path = [(i * 0.033, 100 + (14 if i % 2 else 16)) for i in range(30)]
+    events = run(tracker, path)
+
+    assert [e.kind for e in events] == ["on"]
+
+# Checks a key stays down for min_dwell even if the fingertip leaves at once.
+def test_min_dwell():
+    tracker = FingerTracker(press_radius=15, release_radius=20, min_dwell=0.1)
+    events = run(tracker, [(0.0, 100), (0.03, 300), (0.06, 300), (0.12, 300)])
+
+    assert [(e.kind, e.time) for e in events] == [("on", 0.0), ("off", 0.12)]
+    # Pressed on the finger's first frame, so there is nothing to measure the speed from.
+    assert events[0].speed is None
+
+# Checks the two hands keep separate state for the same finger.
+def test_hands_are_independent():
+    tracker = FingerTracker()
+    left, right = ("Left", 8), ("Right", 8)
+
+    events = tracker.update({left: (100, 100, 0), right: (140, 100, 0)}, TARGETS, NAMES, 0.0)
+    assert sorted(e.note for e in events) == ["C4", "D4"]
+    assert tracker.pressed() == {left: "C4", right: "D4"}
+
+# Checks the optional depth gate on landmark z.
+def test_depth_gating():
+    tracker = FingerTracker(min_dwell=0.0, z_press=0.0, z_release=-0.02)
+
+    assert run(tracker, [(0.0, 100)], z=-0.05) == []
+    assert [e.kind for e in run(tracker, [(0.1, 100)], z=0.01)] == ["on"]
+    # Inside the hysteresis band: still held.
+    assert run(tracker, [(0.2, 100)], z=-0.01) == []
+    assert [e.kind for e in run(tracker, [(0.3, 100)], z=-0.03)] == ["off"]
+
+# Checks a lost hand releases its keys and duplicate labels fall back to the list position.
+def test_lost_hand_and_ids():
+    tracker = FingerTracker(min_dwell=0.0)
+    run(tracker, [(0.0, 100)])
+    events = tracker.update({}, TARGETS, NAMES, 0.1)
+
+    assert [(e.kind, e.note) for e in events] == [("off", "C4")]
+    assert fingertip_ids([1, 1], (8,)) == [[("hand0", 8)], [("hand1", 8)]]
+    assert fingertip_ids([0, 1], (8,)) == [[(0, 8)], [(1, 8)]]
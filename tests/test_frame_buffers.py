@@ -0,0 +1,89 @@
+""" Unit tests for the reusable frame buffers. """
+
+import base64
+import tracemalloc
+import numpy as np
+import cv2
+
+from src.frame_buffers import FrameBufferPool, encode_jpeg_base64
+
+# Builds a few fake 1280x720 camera frames to replay in a loop.
+def make_frames(count=4):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(count)]
+
+# Checks the pooled output matches the old flip -> resize -> cvtColor chain.
+def test_prepare_matches_reference():
+    frame = make_frames(1)[0]
+    pool = FrameBufferPool((854, 480))
+    display, rgb = pool.prepare(frame)
+
+    expected = cv2.resize(cv2.flip(frame, 1), (854, 480))
+    assert display.shape == (480, 854, 3)
+    assert np.abs(display.astype(int) - expected.astype(int)).max() <= 1
+    assert np.array_equal(rgb, display[:, :, ::-1])
+
+# Checks the same arrays are handed back every frame.
+def test_buffers_are_reused():
+    frames = make_frames(2)
+    pool = FrameBufferPool()
+    display_a, rgb_a = pool.prepare(frames[0])
+    display_b, rgb_b = pool.prepare(frames[1])
+
+    assert display_a is display_b
+    assert rgb_a is rgb_b
+    assert pool.allocations == 3
+
+# Replays many frames under tracemalloc and checks no full-size image is allocated once warm.
+def test_flat_allocation_profile_over_long_replay():
+    frames = make_frames()
+    pool = FrameBufferPool()
+
+    # Warms up the pool.
+    for frame in frames:
+        pool.prepare(frame)
+
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for i in range(600):
+            pool.prepare(frames[i % len(frames)])
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # A single new 854x480 image would be ~1.2 MB. Stay well under that at any point.
+    assert peak - start < 64 * 1024
+    assert current - start < 16 * 1024
+    assert pool.allocations == 3
+
+# Checks the encoder returns a valid Base64 JPEG.
+def test_encode_jpeg_base64():
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    b64 = encode_jpeg_base64(frame)
+    raw = base64.b64decode(b64)
+
+    # JPEG files start with the FF D8 marker.
+    assert raw[:2] == b"\xff\xd8"
+
+# Checks MediaPipe's RGB image can be smaller than the preview.
+def test_detect_size():
+    frame = make_frames(1)[0]
+    pool = FrameBufferPool((854, 480), detect_size=(480, 270))
+    display, rgb = pool.prepare(frame)
+
+    assert display.shape == (480, 854, 3)
+    assert rgb.shape == pool.rgb_shape == (270, 480, 3)
+    expected = cv2.flip(cv2.resize(frame, (480, 270), interpolation=cv2.INTER_AREA), 1)[:, :, ::-1]
+    assert np.array_equal(rgb, expected)
+
+# Checks a detection size above the preview is taken from the raw frame, so it keeps detail the preview lost.
+def test_detect_size_above_preview():
+    frame = cv2.resize(make_frames(1)[0], (1920, 1080), interpolation=cv2.INTER_NEAREST)
+    pool = FrameBufferPool((854, 480), detect_size=(1280, 720))
+    display, rgb = pool.prepare(frame)
+
+    assert rgb.shape == (720, 1280, 3)
+    expected = cv2.flip(cv2.resize(frame, (1280, 720), interpolation=cv2.INTER_AREA), 1)[:, :, ::-1]
+    assert np.array_equal(rgb, expected)
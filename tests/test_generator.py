@@ -0,0 +1,57 @@
+""" Tests for the printable sheet generator (vector output). """
+
+import re
+import numpy as np
+import cv2
+
+from src.generator import page_layout, marker_cells, render_svg, render_pdf, generate_seamless_piano
+from src.piano_logic import WHITE_KEYS_PER_PAGE
+
+ARUCO_DICT = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+
+# Painting the merged cells must give back exactly the marker OpenCV generates.
+def test_marker_cells_match_opencv():
+    cell = 50
+    for marker_id in (0, 7, 11):
+        img = np.full((6 * cell, 6 * cell), 255, dtype=np.uint8)
+        for col, row, run in marker_cells(ARUCO_DICT, marker_id):
+            img[row * cell : (row + 1) * cell, col * cell : (col + run) * cell] = 0
+        np.testing.assert_array_equal(img, cv2.aruco.generateImageMarker(ARUCO_DICT, marker_id, 6 * cell))
+
+# Checks the page layout (keys and markers) matches the page tables.
+def test_page_layout():
+    layout = page_layout(0)
+    assert len(layout["white"]) == WHITE_KEYS_PER_PAGE[0]
+    assert [m[0] for m in layout["markers"]] == [0, 1]
+    # Page 1 starts at A0, which has A#0 to its right but no black key on its left edge.
+    assert 0.0 not in layout["black"]
+    assert [m[0] for m in page_layout(5)["markers"]] == [10, 11]
+
+# Checks every key and marker cell ends up in the SVG, and the page stays small.
+def test_render_svg():
+    layout = page_layout(1)
+    svg = render_svg(layout, ARUCO_DICT)
+    assert svg.startswith("<svg")
+    cells = sum(len(marker_cells(ARUCO_DICT, m[0])) for m in layout["markers"])
+    assert svg.count("<rect") == 1 + len(layout["white"]) + len(layout["black"]) + cells
+    assert len(svg) < 10_000
+
+# Checks the PDF has one page per layout and a valid cross-reference table.
+def test_render_pdf():
+    layouts = [page_layout(i) for i in range(len(WHITE_KEYS_PER_PAGE))]
+    pdf = render_pdf(layouts, ARUCO_DICT)
+    assert pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF")
+    assert pdf.count(b"/Type /Page ") == len(layouts)
+
+    # Every xref entry points at the start of its object.
+    xref = int(re.search(rb"startxref\n(\d+)", pdf).group(1))
+    offsets = [int(m) for m in re.findall(rb"(\d{10}) 00000 n", pdf[xref:])]
+    for number, offset in enumerate(offsets, 1):
+        assert pdf[offset:].startswith(f"{number} 0 obj".encode())
+
+# Checks only the requested formats are written.
+def test_generate_vector_only(tmp_path):
+    out = tmp_path / "pages"
+    generate_seamless_piano(str(out), ("svg", "pdf"))
+    names = sorted(p.name for p in out.iterdir())
+    assert names == [f"Page_{i}.svg" for i in range(1, 7)] + ["piano_pages.pdf"]
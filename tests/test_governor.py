@@ -0,0 +1,66 @@
+""" Unit tests for the frame-budget governor. """
+
+from src.governor import FrameGovernor, QUALITY_LEVELS, DEFAULT_LEVEL
+
+# Feeds `frames` frames of the same cost, one every 1/30 s starting at `start`. Returns (changes, end time).
+# stop_on_change stops right after the first level change.
+def feed(governor, cost, frames, start=0.0, stop_on_change=False):
+    changes = []
+    t = start
+    for _ in range(frames):
+        t += 1 / 30
+        settings = governor.update(cost, t)
+        if settings:
+            changes.append(governor.level)
+            if stop_on_change:
+                break
+    return changes, t
+
+# Checks the default level is what the app used before (1280x720 camera, 854x480 detection, light model).
+def test_default_level():
+    settings = FrameGovernor().settings
+    assert settings == QUALITY_LEVELS[DEFAULT_LEVEL]
+    assert settings["capture"] == (1280, 720) and settings["detect"] == (854, 480)
+    assert settings["model_complexity"] == 0 and settings["max_num_hands"] == 2
+
+# Checks slow frames step the quality down, one level per cooldown, until the bottom.
+def test_steps_down_when_over_budget():
+    governor = FrameGovernor(target_fps=30, window=30, cooldown=2.0)
+    changes, _ = feed(governor, 0.05, 30 * 10)
+    assert changes == [1, 0]
+
+# Checks fast frames step the quality up to the most accurate level.
+def test_steps_up_when_well_under_budget():
+    governor = FrameGovernor(target_fps=30, window=30, cooldown=2.0)
+    changes, _ = feed(governor, 0.005, 30 * 10)
+    assert changes == [3, 4]
+
+# Checks nothing changes inside the hysteresis band (under budget, but not by enough to step up).
+def test_holds_inside_hysteresis_band():
+    governor = FrameGovernor(target_fps=30, headroom=0.6, window=30, cooldown=2.0)
+    changes, _ = feed(governor, 0.8 / 30, 30 * 20)
+    assert changes == []
+    assert governor.level == DEFAULT_LEVEL
+
+# Checks a level that proved too slow right after stepping up is not retried straight away, and the wait grows.
+def test_backs_off_after_failed_step_up():
+    governor = FrameGovernor(target_fps=30, window=30, cooldown=2.0)
+    governor.up_backoff = 20.0
+
+    # Fast at level 2 -> steps up to 3, which turns out too slow -> back to 2.
+    changes, t = feed(governor, 0.005, 90, stop_on_change=True)
+    assert changes == [3]
+    changes, t = feed(governor, 0.05, 90, t, stop_on_change=True)
+    assert changes == [2]
+
+    # Fast again, but level 3 stays blocked for 20 s.
+    changes, t = feed(governor, 0.005, 30 * 15, t)
+    assert changes == []
+    changes, t = feed(governor, 0.005, 30 * 10, t, stop_on_change=True)
+    assert changes == [3]
+
+    # Failing again blocks it for twice as long.
+    changes, t = feed(governor, 0.05, 90, t, stop_on_change=True)
+    assert changes == [2]
+    changes, t = feed(governor, 0.005, 30 * 35, t)
+    assert changes == []
@@ -0,0 +1,98 @@
+""" Tests for the out-of-process hand inference (shared-memory ring + pipe). """
+
+from types import SimpleNamespace
+from multiprocessing import shared_memory
+import numpy as np
+import pytest
+
+from src.inference_worker import ProcessHandDetector
+from src.landmark_cache import LandmarkCache
+
+CONFIG = {"min_detection_confidence": 0.6, "min_tracking_confidence": 0.6, "max_num_hands": 2, "model_complexity": 0}
+
+# A stand-in for MediaPipe Hands (built inside the worker, so it lives at module level).
+# It reports one hand whose landmarks sit at x = the frame's first pixel value / 255, which proves the worker
+# really saw the frame that was written into shared memory.
+class FrameHands:
+    def process(self, rgb):
+        x = float(rgb[0, 0, 0]) / 255
+        landmark = [SimpleNamespace(x=x, y=0.5, z=0.0) for _ in range(21)]
+        handedness = [SimpleNamespace(classification=[SimpleNamespace(label="Left")])]
+        return SimpleNamespace(multi_hand_landmarks=[SimpleNamespace(landmark=landmark)], multi_handedness=handedness)
+
+def _frame(value):
+    return np.full((24, 32, 3), value, dtype=np.uint8)
+
+# Checks frames go through the ring and the landmarks come back in order, with several frames in flight.
+def test_round_trip_in_order():
+    detector = ProcessHandDetector(FrameHands, CONFIG, slots=2)
+    try:
+        tickets = [detector.submit(_frame(v)) for v in (51, 102, 153, 204)]
+        for ticket, v in zip(tickets, (51, 102, 153, 204)):
+            landmarks, handedness = detector.collect(ticket)
+            assert landmarks.shape == (1, 21, 3)
+            assert np.isclose(landmarks[0, 0, 0], v / 255)
+            assert list(handedness) == [0]
+
+        stats = detector.stats()
+        assert stats["frames"] == 4
+        assert stats["round_trip_ms_p95"] > 0
+    finally:
+        detector.close()
+
+# Checks a frame written straight into the ring slot is used as-is (zero-copy handoff).
+def test_frame_buffer_zero_copy():
+    detector = ProcessHandDetector(FrameHands, CONFIG)
+    try:
+        slot = detector.frame_buffer((24, 32, 3))
+        slot[...] = 255
+        landmarks, _ = detector.process(slot)
+        assert np.isclose(landmarks[0, 0, 0], 1.0)
+    finally:
+        detector.close()
+
+# Checks two detectors (e.g. two cameras) run side by side, and repeated frames come from the cache.
+def test_independent_workers_and_cache(tmp_path):
+    cache = LandmarkCache(str(tmp_path / "landmarks.db"))
+    first = ProcessHandDetector(FrameHands, CONFIG, cache)
+    second = ProcessHandDetector(FrameHands, CONFIG)
+    try:
+        a, b = first.submit(_frame(51)), second.submit(_frame(204))
+        assert np.isclose(second.collect(b)[0][0, 0, 0], 0.8)
+        assert np.isclose(first.collect(a)[0][0, 0, 0], 0.2)
+
+        first.process(_frame(51))
+        assert (first.hits, first.misses) == (1, 1)
+    finally:
+        first.close()
+        second.close()
+
+# Checks a replacement detector carries on the counters of the one it replaces.
+def test_continue_stats():
+    with ProcessHandDetector(FrameHands, CONFIG) as first:
+        first.process(_frame(51))
+        first.process(_frame(102))
+    with ProcessHandDetector(FrameHands, CONFIG) as second:
+        second.continue_stats(first)
+        second.process(_frame(153))
+        stats = second.stats()
+    assert stats["frames"] == 3
+    assert stats["worker_cpu_s"] >= first.worker_cpu
+
+# Checks the ring is unlinked even when stopping the worker fails.
+def test_close_unlinks_ring_on_error(monkeypatch):
+    detector = ProcessHandDetector(FrameHands, CONFIG)
+    detector.process(_frame(51))
+    name = detector._shm.name
+    process = detector._process
+
+    def failing_join(timeout=None):
+        raise RuntimeError("join failed")
+
+    monkeypatch.setattr(process, "join", failing_join)
+    with pytest.raises(RuntimeError):
+        detector.close()
+    process.terminate()
+
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
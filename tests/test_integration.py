@@ -23,7 +23,7 @@ def test_full_note_flow(mock_audio_engine):
     logic.set_sheet_by_id(0)
 
     # Simulates touching the exact center of the page.
-    # In piano_logic.py, get_note_at_percent(0.5) returns the note at index 6 (F#1).
+    # Page 1 has 9 white keys (A0 to B1), so the center lands on the 5th one (E1).
     detected_note = logic.get_note_at_percent(0.5)
 
     # Simulates System Response (Checks the "If Hit" block in main.py.).
@@ -34,18 +34,18 @@ def test_full_note_flow(mock_audio_engine):
         db.log_note(session_id, detected_note)
 
     # Verifies Logic.
-    assert detected_note == "F#1"
+    assert detected_note == "E1"
 
     # Checks if the audio library's trigger function was actually touched.
     mock_audio_engine.fs.noteon.assert_called()
 
-    # Queries the database to ensure the note "F#1" was successfully saved.
+    # Queries the database to ensure the note "E1" was successfully saved.
     cursor = db.conn.cursor()
     cursor.execute("SELECT note FROM Notes WHERE session_id=?", (session_id,))
     result = cursor.fetchone()
 
     assert result is not None
-    assert result[0] == "F#1"
+    assert result[0] == "E1"
 
 # Ensure the app tries a backup method if the main audio driver fails.
 def test_audio_driver_fallback():
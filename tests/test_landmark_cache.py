@@ -0,0 +1,89 @@
+""" Unit tests for the persistent hand-landmark cache. """
+
+from types import SimpleNamespace
+import numpy as np
+
+from src.hands import HandDetector
+from src.landmark_cache import LandmarkCache
+
+CONFIG = {"min_detection_confidence": 0.6, "min_tracking_confidence": 0.6, "max_num_hands": 2, "model_complexity": 0}
+
+# A stand-in for mp.solutions.hands.Hands that reports one hand with every landmark at (0.5, 0.25, 0).
+class FakeHands:
+    def __init__(self):
+        self.calls = 0
+
+    def process(self, rgb):
+        self.calls += 1
+        landmark = [SimpleNamespace(x=0.5, y=0.25, z=0.0) for _ in range(21)]
+        handedness = [SimpleNamespace(classification=[SimpleNamespace(label="Right")])]
+        return SimpleNamespace(multi_hand_landmarks=[SimpleNamespace(landmark=landmark)], multi_handedness=handedness)
+
+# Checks that the Hands configuration is part of the key.
+def test_key_depends_on_frame_and_config():
+    frame = np.zeros((4, 4, 3), dtype=np.uint8)
+    other = frame.copy()
+    other[0, 0, 0] = 1
+
+    key = LandmarkCache.make_key(frame, CONFIG)
+    assert key == LandmarkCache.make_key(frame.copy(), dict(CONFIG))
+    assert key != LandmarkCache.make_key(other, CONFIG)
+    assert key != LandmarkCache.make_key(frame, {**CONFIG, "model_complexity": 1})
+
+# Checks a second replay of the same frames never calls the model (and never even creates it).
+def test_replay_skips_inference(tmp_path):
+    db_path = str(tmp_path / "landmarks.db")
+    frames = [np.full((8, 8, 3), i, dtype=np.uint8) for i in range(3)]
+
+    first_hands = FakeHands()
+    detector = HandDetector(lambda: first_hands, CONFIG, LandmarkCache(db_path))
+    for frame in frames:
+        detector.process(frame)
+    detector.close()
+    assert first_hands.calls == 3
+
+    created = []
+    detector = HandDetector(lambda: created.append(1), CONFIG, LandmarkCache(db_path))
+    landmarks, handedness = detector.process(frames[1])
+
+    assert created == []
+    assert detector.hits == 1
+    assert landmarks.shape == (1, 21, 3)
+    assert np.allclose(landmarks[0, 8], [0.5, 0.25, 0.0])
+    assert handedness.tolist() == [1]
+
+# Checks the least-recently-used entries are evicted once the cache is full.
+def test_lru_eviction(tmp_path):
+    cache = LandmarkCache(str(tmp_path / "landmarks.db"), max_entries=2, flush_every=1)
+    empty = (np.zeros((0, 21, 3), dtype=np.float32), np.zeros(0, dtype=np.int8))
+
+    cache.put(b"a", *empty)
+    cache.put(b"b", *empty)
+    # Touches "a" so "b" becomes the oldest.
+    assert cache.get(b"a") is not None
+    cache.put(b"c", *empty)
+
+    assert len(cache) == 2
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") is not None
+    assert cache.get(b"c") is not None
+
+# Checks the running count matches the table across updates, evictions and a reopen, and close() closes it.
+def test_count_and_close(tmp_path):
+    db_path = str(tmp_path / "landmarks.db")
+    cache = LandmarkCache(db_path, max_entries=3, flush_every=100)
+    empty = (np.zeros((0, 21, 3), dtype=np.float32), np.zeros(0, dtype=np.int8))
+    for key in (b"a", b"b", b"a", b"c", b"d", b"e"):
+        cache.put(key, *empty)
+    assert len(cache) == 5
+    cache.flush()
+    assert len(cache) == 3
+
+    detector = HandDetector(FakeHands, CONFIG, cache)
+    detector.close()
+    assert cache.conn is None
+
+    reopened = LandmarkCache(db_path)
+    assert len(reopened) == 3
+    assert reopened.get(b"a") is None and reopened.get(b"e") is not None
+    reopened.close()
@@ -1,45 +1,65 @@
 """ Unit tests for the Piano Logic. """
 
-from src.piano_logic import PianoMapper
+import numpy as np
 
-# Checks if touching the very left edge (0.01) returns the first note of the active list.
+from src.piano_logic import PianoMapper, KEY_NAMES, KEY_MIDI, KEY_LEFT, KEY_RIGHT, KEY_IS_BLACK, note_to_midi
+
+# Checks the 88-key tables run from A0 (MIDI 21) to C8 (MIDI 108).
+def test_full_keyboard_tables():
+    assert len(KEY_NAMES) == 88
+    assert (KEY_NAMES[0], KEY_NAMES[39], KEY_NAMES[-1]) == ("A0", "C4", "C8")
+    assert KEY_MIDI[39] == 60
+    assert KEY_IS_BLACK.sum() == 36
+    assert all(note_to_midi(name) == midi for name, midi in zip(KEY_NAMES, KEY_MIDI))
+
+# Checks black keys are narrower than white keys and centered on the line between two white keys.
+def test_key_widths():
+    a0, a_sharp0, b0 = 0, 1, 2
+    assert KEY_RIGHT[a0] - KEY_LEFT[a0] == 1.0
+    assert np.isclose(KEY_RIGHT[a_sharp0] - KEY_LEFT[a_sharp0], 0.55)
+    assert np.isclose((KEY_LEFT[a_sharp0] + KEY_RIGHT[a_sharp0]) / 2, KEY_RIGHT[a0])
+    assert KEY_LEFT[b0] == KEY_RIGHT[a0]
+
+# Checks touching the very left edge returns the first white key of the page.
 def test_page_boundaries():
     logic = PianoMapper()
     logic.set_sheet_by_id(0)
 
     # The very far left edge (4%)
-    assert logic.get_note_at_percent(0.04) == "C1"
+    assert logic.get_note_at_percent(0.04) == "A0"
+    assert logic.get_note_at_percent(1.0) is None
 
-# Verifies that a specific percentage corresponds to a specific sharp note.
+# Checks the black key only wins in the upper (black key) row.
 def test_black_key_split():
     logic = PianoMapper()
     logic.set_sheet_by_id(0)
 
-    # Slightly to the right (10%)
-    assert logic.get_note_at_percent(0.10) == "C#1"
+    # Slightly to the left of the A0/B0 line (10%). A#0 covers 1/9 +- 0.275/9 of the page.
+    assert logic.get_note_at_percent(0.10, black_row=True) == "A#0"
+    assert logic.get_note_at_percent(0.10) == "A0"
+    # Between C#1 and D#1 there is a gap where D1 is still visible in the upper row.
+    assert logic.get_note_at_percent(3.5 / 9, black_row=True) == "D1"
 
-# Verifies that changing the marker ID changes the octave.
-# Checks that passing Marker ID 2 updates the internal state to start at "C2" (Octave 2).
-def test_octave_switching():
+# Verifies that changing the marker ID switches to that page's keys.
+def test_page_switching():
     logic = PianoMapper()
 
-    # Default is Octave 1.
-    assert logic.current_start_octave == 1
-
-    # Simulate seeing Marker ID 2 (should be Octave 2).
-    logic.set_sheet_by_id(2)
-    assert logic.current_start_octave == 2
-
-    # Verify the keys list updated (First note should be C2).
+    # Marker 2 and 3 belong to page 2, which starts at C2 and ends on the half D#3 key on the seam.
+    logic.set_sheet_by_id(3)
     assert logic.active_keys[0] == "C2"
+    assert logic.active_keys[-1] == "D#3"
+    assert logic.get_note_at_percent(0.0) == "C2"
 
-# Verifies looking up a note by percentage.
-# Checks that 0.0% on Marker 0 returns "C1".
-def test_note_lookup():
-    logic = PianoMapper()
+    # IDs beyond the printed pages have no keys.
+    assert logic.set_sheet_by_id(40) is False
+    assert logic.active_keys == []
 
-    # Ensure we are on Octave 1.
+# Checks the batched lookup agrees with the single lookup.
+def test_batched_lookup():
+    logic = PianoMapper()
     logic.set_sheet_by_id(0)
+    us = np.linspace(-0.1, 1.1, 50)
 
-    # 0.0 (0%) -> First Index -> C1.
-    assert logic.get_note_at_percent(0.0) == "C1"
\ No newline at end of file
+    keys = logic.keys_at_percents(us, black_row=True)
+    expected = [logic.get_note_at_percent(u, black_row=True) for u in us]
+    assert [KEY_NAMES[k] if k >= 0 else None for k in keys] == expected
@@ -0,0 +1,177 @@
+""" This drives the CV loop in main.py with a fake camera and hand model (no window, no audio, no database). """
+
+import sys
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import numpy as np
+import cv2
+import pytest
+
+# pywebview needs a display. The loop never opens a window, so a mock is enough for 'import webview'.
+sys.modules.setdefault("webview", MagicMock())
+
+import main
+from src.governor import QUALITY_LEVELS
+from src.piano_logic import PianoMapper, IDENTITY_CONFIG
+from src.recorder import Recording, RecordingWriter
+
+# A camera that honours resolution changes like a real one, and stops the app after a number of frames.
+class ResizingCapture:
+    def __init__(self, app, frames):
+        self.app = app
+        self.frames = frames
+        self.size = [1280, 720]
+        self.reads = 0
+        self.released = False
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.size[0] = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.size[1] = int(value)
+        return True
+
+    def read(self):
+        self.reads += 1
+        if self.reads >= self.frames:
+            self.app.running = False
+        return True, np.full((self.size[1], self.size[0], 3), 255, dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+# A hand model that never finds a hand.
+class NoHands:
+    def process(self, rgb):
+        return SimpleNamespace(multi_hand_landmarks=None, multi_handedness=None)
+
+    def close(self):
+        pass
+
+# A governor that steps down a level after every frame.
+class JumpyGovernor:
+    def __init__(self, target_fps=30):
+        self.level = len(QUALITY_LEVELS) - 1
+
+    @property
+    def settings(self):
+        return QUALITY_LEVELS[self.level]
+
+    def update(self, frame_cost, now=None):
+        self.level = max(0, self.level - 1)
+        return self.settings
+
+# Runs every test in its own folder, so PianoApp's default database file is not created inside the repo.
+@pytest.fixture(autouse=True)
+def in_tmp_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+# Builds an app with a fake camera and hands, and without audio or a database.
+def make_app(frames, **kwargs):
+    app = main.PianoApp(**kwargs)
+    app.audio = None
+    app.db = None
+    app.hands_factory = NoHands
+    cap = ResizingCapture(app, frames)
+    app._open_capture = lambda: cap
+    app.running = True
+    return app, cap
+
+# Recording in auto quality keeps one level, so the camera resolution (and the recorded frame shape) never changes.
+def test_recording_keeps_quality_level(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "FrameGovernor", JumpyGovernor)
+    app, cap = make_app(6, record_path=str(tmp_path / "rec"), quality="auto")
+    app._cv_loop()
+
+    rec = Recording(str(tmp_path / "rec"))
+    assert len(rec) == 6
+    assert rec.frame_shape == (720, 1280, 3)
+    assert cap.released
+
+# Without a recording, the same governor does change the camera resolution mid-session.
+def test_auto_quality_changes_resolution(monkeypatch):
+    monkeypatch.setattr(main, "FrameGovernor", JumpyGovernor)
+    app, cap = make_app(3, quality="auto")
+    changes = []
+    app.on_frame = lambda metrics: changes.append(metrics["quality_changes"])
+    app._cv_loop()
+    assert cap.size != [1280, 720]
+    # The changes are counted for the frame metrics and the exit report, not printed as they happen.
+    assert changes == [0, 1, 2]
+
+# The recording and the camera are closed even when the loop fails.
+def test_recording_closed_on_error(tmp_path):
+    app, cap = make_app(10, record_path=str(tmp_path / "rec"), quality="2")
+
+    # Fails on the third frame.
+    def on_frame(metrics):
+        if metrics["frame"] == 3:
+            raise RuntimeError("boom")
+
+    app.on_frame = on_frame
+    with pytest.raises(RuntimeError):
+        app._cv_loop()
+
+    assert len(Recording(str(tmp_path / "rec"))) == 3
+    assert cap.released
+
+# A hand model that must not run (replays use the recorded hands).
+class FailingHands:
+    def __init__(self):
+        raise AssertionError("hand inference ran during a replay")
+
+# Writes a recording of blank frames whose recorded markers (page 1) and index fingertip sit on the key C1.
+# Only the recorded data can play the note: the frames themselves show nothing.
+def write_blank_session(path, count=4):
+    corners = [np.array([[[x - 40, 360], [x + 40, 360], [x + 40, 440], [x - 40, 440]]], dtype=np.float32) for x in (980, 300)]
+    ids = np.array([[0], [1]])
+
+    # Where the key lands on the 854x480 preview, worked out like the CV loop does.
+    sx, sy = 854 / 1280, 480 / 720
+    centers = sorted((854 - x * sx, 400 * sy) for x in (980, 300))
+    logic = PianoMapper()
+    logic.set_sheet_by_id(0)
+    targets = logic.key_targets(centers[0], centers[-1], IDENTITY_CONFIG, 130, 90)
+    kx, ky = targets[logic.active_keys.index("C1")]
+    landmarks = np.zeros((1, 21, 3), dtype=np.float32)
+    landmarks[0, :, 1] = 0.99
+    landmarks[0, 8] = (kx / 854, ky / 480, 0.0)
+
+    with RecordingWriter(path) as writer:
+        for i in range(count):
+            frame = np.full((720, 1280, 3), 255, dtype=np.uint8)
+            writer.append(frame, corners, ids, landmarks, np.array([1], dtype=np.int8), [], timestamp=100.0 + i / 30)
+
+# Checks a replay feeds the recorded markers and hands into the trigger logic without running any model.
+def test_replay_uses_recorded_detections(tmp_path):
+    path = str(tmp_path / "rec")
+    write_blank_session(path)
+    app = main.PianoApp(replay_path=path, quality="2")
+    app.audio = None
+    app.db = None
+    app.hands_factory = FailingHands
+    notes = []
+    app.on_frame = lambda metrics: notes.append(metrics["notes"])
+    app.running = True
+    app._cv_loop()
+
+    assert notes == [1, 0, 0, 0]
+
+# Checks --replay-inference runs the hand model on the frames again (which here see no sheet, so nothing plays).
+def test_replay_inference(tmp_path):
+    path = str(tmp_path / "rec")
+    write_blank_session(path)
+    app = main.PianoApp(replay_path=path, replay_inference=True, quality="2")
+    app.audio = None
+    app.db = None
+    app.hands_factory = NoHands
+    notes = []
+    app.on_frame = lambda metrics: notes.append(metrics["notes"])
+    app.running = True
+    app._cv_loop()
+
+    assert notes == [0, 0, 0, 0]
@@ -0,0 +1,15 @@
+""" Tests for the ArUco marker detector wrapper. """
+
+import cv2
+
+from src.generator import page_layout, render_png
+from src.markers import make_marker_detector
+
+# Checks both markers of a printed page are found at camera size, whatever the OpenCV build.
+def test_detects_generated_page():
+    aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+    frame = cv2.resize(render_png(page_layout(1), aruco_dict), (1280, 905), interpolation=cv2.INTER_AREA)[:720]
+
+    corners, ids, _ = make_marker_detector(aruco_dict)(frame)
+    assert sorted(ids.ravel().tolist()) == [2, 3]
+    assert corners[0].shape == (1, 4, 2)
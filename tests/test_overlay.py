@@ -0,0 +1,45 @@
+""" Unit tests for the cached key-zone overlay. """
+
+import json
+import numpy as np
+import cv2
+
+from src.overlay import KeyOverlay, build_overlay_message
+
+POSITIONS = [(100.0, 100.0), (150.0, 120.0), (200.0, 100.0)]
+
+# Checks the composited overlay is pixel-identical to drawing the circles directly.
+def test_matches_direct_drawing():
+    frame = np.full((240, 320, 3), 30, dtype=np.uint8)
+    expected = frame.copy()
+    for x, y in POSITIONS:
+        cv2.circle(expected, (int(x), int(y)), 15, (160, 160, 160), 1)
+
+    KeyOverlay(15).draw(frame, POSITIONS)
+    assert np.array_equal(frame, expected)
+
+# Checks sub-pixel jitter reuses the layer and a real move re-renders it.
+def test_layer_is_cached_per_pose():
+    overlay = KeyOverlay(15, tolerance=1.0)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+    overlay.draw(frame, POSITIONS)
+    overlay.draw(frame, [(x + 0.4, y - 0.3) for x, y in POSITIONS])
+    assert overlay.renders == 1
+
+    overlay.draw(frame, [(x + 5, y) for x, y in POSITIONS])
+    assert overlay.renders == 2
+
+# Checks the browser message carries integer targets, hits and landmark pixels.
+def test_overlay_message():
+    landmarks = np.full((1, 21, 3), 0.5, dtype=np.float32)
+    msg = json.loads(build_overlay_message(854, 480, POSITIONS, [1], landmarks, 15, ["C4", "C#4", "D4"]))
+
+    assert msg["k"] == [100, 100, 150, 120, 200, 100]
+    assert msg["hit"] == [1]
+    assert len(msg["l"]) == 1 and msg["l"][0][:2] == [427, 240]
+    assert msg["n"] == ["C4", "C#4", "D4"]
+
+    # Names are left out when not given, and no hands gives an empty list.
+    msg = json.loads(build_overlay_message(854, 480, [], [], np.zeros((0, 21, 3)), 15))
+    assert "n" not in msg and msg["l"] == [] and msg["k"] == []
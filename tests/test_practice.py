@@ -0,0 +1,84 @@
+""" Unit tests for practice mode (loading a piece and following it live). """
+
+import struct
+
+from src.practice import ExpectedNote, StreamingAligner, load_expected_notes
+
+# A C major scale, one note every half second.
+SCALE = [ExpectedNote(i * 0.5, midi) for i, midi in enumerate([60, 62, 64, 65, 67, 69, 71, 72])]
+
+# Writes a one-track MIDI file: 480 ticks per quarter, 60 BPM, C4 then E4 one beat later (plus a drum hit).
+def write_midi(path):
+    events = (
+        b"\x00\xff\x51\x03\x0f\x42\x40"  # Tempo: 1,000,000 us per quarter.
+        b"\x00\x90\x3c\x64"  # C4 on.
+        b"\x00\x99\x24\x64"  # Drum on channel 10 (ignored).
+        b"\x83\x60\x80\x3c\x00"  # 480 ticks later: C4 off.
+        b"\x00\x90\x40\x64"  # E4 on.
+        b"\x83\x60\x40\x00"  # Running status: E4 off (velocity 0).
+        b"\x00\xff\x2f\x00"  # End of track.
+    )
+    header = b"MThd" + struct.pack(">IHHH", 6, 0, 1, 480)
+    track = b"MTrk" + struct.pack(">I", len(events)) + events
+    path.write_bytes(header + track)
+
+# Checks MIDI and text pieces load with onset times (MIDI only).
+def test_load_pieces(tmp_path):
+    midi_path = tmp_path / "piece.mid"
+    write_midi(midi_path)
+    assert load_expected_notes(str(midi_path)) == [ExpectedNote(0.0, 60), ExpectedNote(1.0, 64)]
+
+    text_path = tmp_path / "piece.txt"
+    text_path.write_text("C4 D4\nE4")
+    assert [n.midi for n in load_expected_notes(str(text_path))] == [60, 62, 64]
+
+# Checks a clean performance is all correct, with timing measured from the first note.
+def test_perfect_performance():
+    aligner = StreamingAligner(SCALE)
+    results = [aligner.add(n.midi, 100.0 + n.time + (0.05 if i == 3 else 0.0)) for i, n in enumerate(SCALE)]
+
+    assert all(r.correct for r in results)
+    assert [r.index for r in results] == list(range(8))
+    assert abs(results[3].timing_error - 0.05) < 1e-9
+    assert aligner.finished and aligner.accuracy == 1.0
+
+# Checks the aligner recovers from an extra note, a wrong note and a skipped note.
+def test_mistakes():
+    aligner = StreamingAligner(SCALE, window=4)
+    played = [60, 61, 62, 64, 66, 67, 71, 72]
+    results = [aligner.add(m) for m in played]
+
+    # 61 is an extra note, 66 is a wrong note where 65 was expected, and 69 is skipped.
+    assert results[1].expected is None
+    assert not results[4].correct
+    assert results[6].correct and results[6].index == 6
+    assert results[7].correct and aligner.finished
+
+# Checks a repeated note is only credited once per expected note, with or without extra wrong notes around it.
+def test_repeated_notes():
+    aligner = StreamingAligner([ExpectedNote(None, m) for m in [60, 62, 64, 65, 67]])
+    results = [aligner.add(m) for m in [60, 62, 62, 62, 62, 64]]
+    assert [r.index for r in results] == [0, 1, -1, -1, -1, 2]
+    assert aligner.accuracy == 3 / 6
+
+    aligner = StreamingAligner([ExpectedNote(None, m) for m in [60, 60, 60, 62]])
+    results = [aligner.add(m) for m in [60, 60, 60, 60, 62]]
+    assert [r.correct for r in results] == [True, True, True, False, True]
+    assert results[3].index == -1 and results[4].index == 3
+
+    # Wrong notes in between do not let an expected note be credited twice either.
+    aligner = StreamingAligner(SCALE)
+    results = [aligner.add(m) for m in [60, 61, 60, 62, 63, 62, 64]]
+    credited = [r.index for r in results if r.correct]
+    assert credited == [0, 1, 2]
+    assert aligner.correct == 3
+
+# Checks the per-note work does not depend on the length of the piece.
+def test_window_is_bounded():
+    long_piece = [ExpectedNote(i * 0.25, 60 + i % 12) for i in range(5000)]
+    aligner = StreamingAligner(long_piece, window=8)
+    for n in long_piece[:300]:
+        aligner.add(n.midi, n.time)
+
+    assert len(aligner.cost) == 9
+    assert aligner.position == 300
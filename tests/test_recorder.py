@@ -0,0 +1,72 @@
+""" Unit tests for the session recorder and its memory-mapped replay. """
+
+import numpy as np
+
+from src.recorder import RecordingWriter, Recording, RecordingCapture, RecordedDetections
+
+# Writes a short fake session (5 frames) into tmp_path and returns its directory.
+def write_session(tmp_path, count=5):
+    path = str(tmp_path / "session")
+    with RecordingWriter(path) as writer:
+        for i in range(count):
+            frame = np.full((48, 64, 3), i, dtype=np.uint8)
+            corners = [np.array([[[0, 0], [10, 0], [10, 10], [0, 10]]], dtype=np.float32) + i]
+            ids = np.array([[4]])
+            landmarks = np.full((1, 21, 3), i / 10, dtype=np.float32)
+            handedness = np.array([1], dtype=np.int8)
+            notes = ["C#4"] if i == 2 else []
+            writer.append(frame, corners, ids, landmarks, handedness, notes, timestamp=100.0 + i * 0.5)
+    return path
+
+# Checks every field comes back exactly as it was written.
+def test_round_trip(tmp_path):
+    rec = Recording(write_session(tmp_path))
+
+    assert len(rec) == 5
+    assert rec.frames.shape == (5, 48, 64, 3)
+    assert rec.frames[3, 0, 0, 0] == 3
+
+    corners, ids = rec.markers(1)
+    assert ids.tolist() == [[4]]
+    assert corners[0].shape == (1, 4, 2)
+    assert corners[0][0, 2].tolist() == [11.0, 11.0]
+
+    landmarks, handedness = rec.hands(4)
+    assert landmarks.shape == (1, 21, 3)
+    assert np.allclose(landmarks, 0.4)
+    assert handedness.tolist() == [1]
+
+    assert rec.notes(2) == ["C#4"]
+    assert rec.notes(3) == []
+
+# Checks seeking by time and slicing frames without decoding.
+def test_seek_and_slice(tmp_path):
+    rec = Recording(write_session(tmp_path))
+
+    assert rec.seek(1.0) == 2
+    assert rec.seek(99) == 4
+    assert rec.frames[1:4, 0, 0, 0].tolist() == [1, 2, 3]
+
+# Checks the capture wrapper yields the recorded frames and then stops.
+def test_recording_capture(tmp_path):
+    cap = RecordingCapture(write_session(tmp_path), start=3)
+
+    ret, frame = cap.read()
+    assert ret and frame[0, 0, 0] == 3
+    ret, frame = cap.read()
+    assert ret and frame[0, 0, 0] == 4
+    ret, frame = cap.read()
+    assert not ret and cap.finished
+
+# Checks the recorded markers and hands come back for whichever frame the capture read last.
+def test_recorded_detections(tmp_path):
+    cap = RecordingCapture(write_session(tmp_path))
+    detections = RecordedDetections(cap)
+    for _ in range(3):
+        ret, frame = cap.read()
+
+    corners, ids, rejected = detections.detect_markers(frame)
+    assert ids.tolist() == [[4]] and corners[0][0, 0].tolist() == [2, 2]
+    landmarks, handedness = detections.process(None)
+    assert landmarks.shape == (1, 21, 3) and abs(landmarks[0, 0, 0] - 0.2) < 1e-6
+    assert handedness.tolist() == [1]
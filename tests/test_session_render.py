@@ -0,0 +1,97 @@
+""" Unit tests for the offline session renderer. """
+
+import wave
+import numpy as np
+import pytest
+
+from src import session_render
+from src.db_manager import MusicDB
+from src.session_render import session_events, render_session, latest_session, LEAD_IN, TAIL
+
+# Records what the renderer asks FluidSynth to do, and how many frames it has rendered when it does it.
+class FakeSynth:
+    def __init__(self, samplerate=44100.0):
+        self.calls = []
+        self.frames = 0
+        self.blocks = []
+
+    def sfload(self, path):
+        return 1
+
+    def program_select(self, *args):
+        pass
+
+    def cc(self, *args):
+        pass
+
+    def noteon(self, channel, midi, velocity):
+        self.calls.append(("on", midi, self.frames))
+
+    def noteoff(self, channel, midi):
+        self.calls.append(("off", midi, self.frames))
+
+    def get_samples(self, n):
+        self.frames += n
+        self.blocks.append(n)
+        return np.zeros(2 * n, dtype=np.int16)
+
+    def delete(self):
+        pass
+
+# A session with notes at 0 s, 0.1 s, 0.2 s (C4 struck again) and 60.2 s.
+@pytest.fixture
+def db():
+    db = MusicDB(db_path=":memory:")
+    session_id = db.start_session()
+    for note, ts in [
+        ("C4", "2026-05-01T10:00:00.000"),
+        ("E4", "2026-05-01T10:00:00.100"),
+        ("C4", "2026-05-01T10:00:00.200"),
+        ("G4", "2026-05-01T10:01:00.200"),
+    ]:
+        db.conn.execute("INSERT INTO Notes (session_id, note, timestamp) VALUES (?, ?, ?)", (session_id, note, ts))
+    db.conn.commit()
+    return db
+
+# Checks the events come out in time order, and a re-struck note is not cut short by its first note-off.
+def test_session_events(db):
+    events = [(round(t - LEAD_IN, 3), kind, midi) for t, kind, midi in session_events(db, latest_session(db), 0.4)]
+    assert events == [
+        (0.0, "on", 60),
+        (0.1, "on", 64),
+        (0.2, "off", 60),
+        (0.2, "on", 60),
+        (0.5, "off", 64),
+        (0.6, "off", 60),
+        (60.2, "on", 67),
+        (60.6, "off", 67),
+    ]
+
+# Checks long silences can be shortened.
+def test_session_events_max_gap(db):
+    ons = [round(t - LEAD_IN, 3) for t, kind, _ in session_events(db, latest_session(db), 0.4, max_gap=2.0) if kind == "on"]
+    assert ons == [0.0, 0.1, 0.2, 2.2]
+
+# Checks the WAV has the right length, notes land on the right frames and no block is larger than block_frames.
+def test_render_session(db, tmp_path, monkeypatch):
+    synth = FakeSynth()
+    monkeypatch.setattr(session_render, "Synth", lambda samplerate: synth)
+    soundfont = tmp_path / "piano.sf2"
+    soundfont.write_bytes(b"")
+    out = tmp_path / "session.wav"
+
+    seconds = render_session(db, latest_session(db), str(out), str(soundfont), sample_rate=1000, block_frames=4096)
+
+    assert seconds == pytest.approx(LEAD_IN + 60.6 + TAIL)
+    assert max(synth.blocks) <= 4096
+    assert synth.calls[0] == ("on", 60, 500)
+    assert synth.calls[-1] == ("off", 67, 61100)
+    with wave.open(str(out)) as wav:
+        assert (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (2, 2, 1000)
+        assert wav.getnframes() == synth.frames == 63100
+
+# Checks a missing SoundFont is reported before anything is written.
+def test_render_session_missing_soundfont(db, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        render_session(db, latest_session(db), str(tmp_path / "out.wav"), str(tmp_path / "missing.sf2"))
+    assert not (tmp_path / "out.wav").exists()
@@ -2,56 +2,50 @@
 
 import numpy as np
 
+from src.piano_logic import PianoMapper, IDENTITY_CONFIG
+
 def test_key_position_calculation():
 
     # Defines two fake marker points: Left Marker Center (100, 100) and Right Marker Center (900, 100).
-    p_left = np.array([100.0, 100.0])
-    p_right = np.array([900.0, 100.0])
-
-    # Calculates vector bx (800) and by (0) from Left to Right.
-    bx = p_right[0] - p_left[0]  # 800
-    by = p_right[1] - p_left[1]  # 0
-
-    # Sets constants exactly as they appear in main.py.
-    num_keys = 10
-
-    # Using the DEFAULT_CONFIG values from main.py.
-    PADDING_LEFT = 0.06
-    PADDING_RIGHT = 0.06
-    LINEARITY_BIAS = 1.0
+    p_left = (100.0, 100.0)
+    p_right = (900.0, 100.0)
 
-    # Calculates position for key index 4 (5th key)
-    i = 4
+    logic = PianoMapper()
+    logic.set_sheet_by_id(0)
 
-    # The formula from main.py:
-    u_raw = (i + 0.5) / num_keys  # 4.5 / 10 = 0.45
-    u_biased = u_raw ** LINEARITY_BIAS  # 0.45 ** 1.0 = 0.45
-    usable_width = 1.0 - (PADDING_LEFT + PADDING_RIGHT)  # 1.0 - 0.12 = 0.88
-    u = PADDING_LEFT + (u_biased * usable_width)  # 0.06 + (0.45 * 0.88) = 0.456
+    # No zig-zag offsets, so every target sits on the line between the markers.
+    targets = logic.key_targets(p_left, p_right, IDENTITY_CONFIG, offset_white=0, offset_black=0)
+    assert targets.shape == (len(logic.active_keys), 2)
+    assert np.allclose(targets[:, 1], 100.0)
 
-    # Calculates expected_x and expected_y manually using the formula start + vector * u.
-    expected_x = p_left[0] + (bx * u) # 100 + (800 * 0.456) = 464.8
-    expected_y = p_left[1] + (by * u) # 100 + (0 * 0.456) = 100.0
+    # Keys run left to right, and E1 (the middle of the 9 white keys) lands exactly halfway between the markers.
+    assert np.all(np.diff(targets[:, 0]) > 0)
+    e1 = logic.active_keys.index("E1")
+    assert abs(targets[e1, 0] - 500.0) < 0.1, f"Expected X ~500.0, got {targets[e1, 0]}"
 
-    # Checks if the calculated value is close enough (within 0.1 pixel) to the manually calculated expectation.
-    assert abs(expected_x - 464.8) < 0.1, f"Expected X ~464.8, got {expected_x}"
-    assert abs(expected_y - 100.0) < 0.1, f"Expected Y ~100.0, got {expected_y}"
+    # The outer keys reach past the markers (the markers are printed inside the keyboard's edges).
+    assert targets[0, 0] < 100.0 and targets[-1, 0] > 900.0
 
-# Verify that Sharp notes get one offset (70) and Natural notes get another (130).
+# Verify that Sharp notes get one offset (90) and Natural notes get another (130).
 def test_zigzag_offsets():
+    logic = PianoMapper()
+    logic.set_sheet_by_id(0)
 
     # From main.py settings:
-    OFFSET_BLACK = 90
-    OFFSET_WHITE = 130
+    targets = logic.key_targets((100.0, 100.0), (900.0, 100.0), IDENTITY_CONFIG, offset_white=130, offset_black=90)
+    offsets = 100.0 - targets[:, 1]
 
-    # Sets note_name = "C#4". Checks if it correctly selects 90.
-    note_name = "C#4"
-    current_offset = OFFSET_BLACK if "#" in note_name else OFFSET_WHITE
+    # "C#1" is pushed 90px, "C1" is pushed 130px.
+    assert np.isclose(offsets[logic.active_keys.index("C#1")], 90)
+    assert np.isclose(offsets[logic.active_keys.index("C1")], 130)
 
-    assert current_offset == 90
+# Checks the per-sheet padding squeezes the keys in from the page edges.
+def test_sheet_padding():
+    logic = PianoMapper()
+    logic.set_sheet_by_id(0)
 
-    # Sets note_name = "C4". Checks if it correctly selects 130.
-    note_name = "C4"
-    current_offset = OFFSET_BLACK if "#" in note_name else OFFSET_WHITE
+    plain = logic.key_targets((100.0, 100.0), (900.0, 100.0), IDENTITY_CONFIG, 0, 0)
+    padded = logic.key_targets((100.0, 100.0), (900.0, 100.0), {"pad_l": 0.06, "pad_r": 0.06, "bias": 1.0}, 0, 0)
 
-    assert current_offset == 130
\ No newline at end of file
+    assert padded[0, 0] > plain[0, 0]
+    assert padded[-1, 0] < plain[-1, 0]
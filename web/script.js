@@ -16,6 +16,76 @@ function updateFrame(base64Image) {
     }
 }
 
+// Overlay Canvas
+// Python sends the key targets, hits and hand landmarks every frame (see build_overlay_message in src/overlay.py).
+// They are drawn here so the video itself can be sent less often and at a lower resolution.
+const overlayCanvas = document.getElementById('overlay');
+const overlayCtx = overlayCanvas ? overlayCanvas.getContext('2d') : null;
+let overlayNames = [];
+
+// Same bones as src/hands.py HAND_CONNECTIONS.
+const HAND_CONNECTIONS = [
+    [0, 1], [1, 2], [2, 3], [3, 4], [0, 5], [5, 6], [6, 7], [7, 8],
+    [5, 9], [9, 10], [10, 11], [11, 12], [9, 13], [13, 14], [14, 15], [15, 16],
+    [13, 17], [0, 17], [17, 18], [18, 19], [19, 20]
+];
+
+function updateOverlay(msg) {
+    if (!overlayCtx) return;
+    if (msg.n) overlayNames = msg.n;
+
+    // Matches the canvas to its on-screen size.
+    const cw = overlayCanvas.clientWidth;
+    const ch = overlayCanvas.clientHeight;
+    if (overlayCanvas.width !== cw || overlayCanvas.height !== ch) {
+        overlayCanvas.width = cw;
+        overlayCanvas.height = ch;
+    }
+    overlayCtx.setTransform(1, 0, 0, 1, 0, 0);
+    overlayCtx.clearRect(0, 0, cw, ch);
+
+    // Reproduces the video's "object-fit: cover" scaling so frame pixels land on the same spot.
+    const scale = Math.max(cw / msg.w, ch / msg.h);
+    overlayCtx.setTransform(scale, 0, 0, scale, (cw - msg.w * scale) / 2, (ch - msg.h * scale) / 2);
+
+    // Faint grey key zones.
+    overlayCtx.lineWidth = 1;
+    overlayCtx.strokeStyle = 'rgb(160, 160, 160)';
+    for (let i = 0; i < msg.k.length; i += 2) {
+        overlayCtx.beginPath();
+        overlayCtx.arc(msg.k[i], msg.k[i + 1], msg.r, 0, 2 * Math.PI);
+        overlayCtx.stroke();
+    }
+
+    // Solid green circles and note names for keys being pressed.
+    overlayCtx.fillStyle = 'rgb(0, 255, 0)';
+    overlayCtx.font = 'bold 14px sans-serif';
+    for (const i of msg.hit) {
+        const x = msg.k[2 * i];
+        const y = msg.k[2 * i + 1];
+        overlayCtx.beginPath();
+        overlayCtx.arc(x, y, msg.r, 0, 2 * Math.PI);
+        overlayCtx.fill();
+        if (overlayNames[i]) overlayCtx.fillText(overlayNames[i], x - 10, y - 20);
+    }
+
+    // Hand skeletons (green bones, red joints).
+    overlayCtx.lineWidth = 2;
+    overlayCtx.strokeStyle = 'rgb(0, 255, 0)';
+    overlayCtx.fillStyle = 'rgb(255, 0, 0)';
+    for (const hand of msg.l) {
+        overlayCtx.beginPath();
+        for (const [a, b] of HAND_CONNECTIONS) {
+            overlayCtx.moveTo(hand[2 * a], hand[2 * a + 1]);
+            overlayCtx.lineTo(hand[2 * b], hand[2 * b + 1]);
+        }
+        overlayCtx.stroke();
+        for (let j = 0; j < hand.length; j += 2) {
+            overlayCtx.fillRect(hand[j] - 2, hand[j + 1] - 2, 4, 4);
+        }
+    }
+}
+
 // Update Status (Green/Red Dot)
 // Receives a Base64 string from Python and sets it as the src of the image tag, creating a video stream effect.
 function updateStatus(msg, isError) {
@@ -63,8 +133,44 @@ function highlightNoteString(noteName) {
     }
 }
 
+// Practice Mode
+// Receives one result per played note (see PracticeResult in src/practice.py) plus the running accuracy.
+function updatePractice(result) {
+    const panel = document.getElementById('practice-panel');
+    const accuracy = document.getElementById('practice-accuracy');
+    const last = document.getElementById('practice-last');
+    const progress = document.getElementById('practice-progress');
+    if (!panel) return;
+    panel.hidden = false;
+
+    accuracy.innerText = Math.round(result.accuracy * 100) + "%";
+
+    // Shows what was expected and how early/late the note was.
+    let text;
+    if (result.correct) {
+        text = "\u2713 " + result.played;
+        if (result.timing_error !== null) {
+            const ms = Math.round(result.timing_error * 1000);
+            text += " (" + (ms > 0 ? "+" : "") + ms + " ms)";
+        }
+    } else if (result.expected) {
+        text = "\u2717 " + result.played + " (expected " + result.expected + ")";
+    } else {
+        text = "\u2717 " + result.played + " (extra note)";
+    }
+    last.innerText = text;
+    last.className = result.correct ? "correct" : "wrong";
+    progress.innerText = result.progress + " / " + result.total;
+}
+
 // Signals Python that UI is ready to start the camera. This prevents the "Camera starts before UI exists" crash.
 window.addEventListener('pywebviewready', function() {
     console.log("UI Ready. Signaling Python...");
     pywebview.api.signal_ui_ready();
-});
\ No newline at end of file
+});
+// Tells Python to stop drawing/encoding the preview while the page is hidden.
+document.addEventListener('visibilitychange', function() {
+    if (window.pywebview && pywebview.api) {
+        pywebview.api.set_preview_visible(!document.hidden);
+    }
+});